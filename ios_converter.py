@@ -4,15 +4,25 @@ Converts iOS formats (HEIC/HEIF images, MOV videos) to PNG and MP4
 """
 
 import os
+import re
 import sys
+import queue
+import shutil
+import functools
 import subprocess
 import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import ExitStack
 from pathlib import Path
-from tkinter import Tk, Frame, Label, Button, filedialog, messagebox, StringVar, OptionMenu, ttk
+from tkinter import (Tk, Frame, Label, Button, Spinbox, Checkbutton, filedialog,
+                     messagebox, StringVar, IntVar, BooleanVar, OptionMenu, ttk)
 from tkinter.scrolledtext import ScrolledText
 
 # Try to import pillow-heif for HEIC support
 try:
+    import pillow_heif
     from pillow_heif import register_heif_opener
     register_heif_opener()
     HEIF_SUPPORT = True
@@ -20,10 +30,74 @@ except ImportError:
     HEIF_SUPPORT = False
 
 try:
+    import PIL
     from PIL import Image
     PIL_AVAILABLE = True
+    # Pillow-SIMD (drop-in fork with SSE4/AVX2 kernels) uses .postN versions
+    PILLOW_SIMD = '.post' in PIL.__version__
 except ImportError:
     PIL_AVAILABLE = False
+    PILLOW_SIMD = False
+
+# Optional PyAV for remuxing H.264 videos in-process (no FFmpeg subprocess)
+try:
+    import av
+    AV_AVAILABLE = True
+except ImportError:
+    AV_AVAILABLE = False
+
+
+# Probes are cached per process. Spawned pool workers (Windows, macOS)
+# start with empty caches, so the parent passes its encoder choice to them
+# through _worker_options instead of letting each worker probe again
+
+@functools.lru_cache(maxsize=1)
+def _find_ffmpeg():
+    """Find ffmpeg executable"""
+    # Check if ffmpeg is in PATH (a PATH lookup, no process spawn)
+    path = shutil.which('ffmpeg')
+    if path:
+        return path
+    
+    # Common installation paths on Windows
+    common_paths = [
+        r'C:\ffmpeg\bin\ffmpeg.exe',
+        r'C:\Program Files\ffmpeg\bin\ffmpeg.exe',
+        r'C:\Program Files (x86)\ffmpeg\bin\ffmpeg.exe',
+    ]
+    
+    for path in common_paths:
+        if os.path.exists(path):
+            return path
+    
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def _detect_h264_encoder(ffmpeg_path):
+    """Pick a working hardware H.264 encoder, or libx264 if there is none"""
+    try:
+        result = subprocess.run([ffmpeg_path, '-hide_banner', '-encoders'],
+                                capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return 'libx264'
+    
+    for encoder in IOSConverter.HW_ENCODERS:
+        if encoder not in result.stdout:
+            continue
+        
+        # Builds often list encoders the hardware can't run, so try one frame
+        test_cmd = [ffmpeg_path, '-hide_banner',
+                    '-f', 'lavfi', '-i', 'color=size=256x256:rate=1',
+                    '-frames:v', '1', '-c:v', encoder, '-f', 'null', '-']
+        try:
+            test = subprocess.run(test_cmd, capture_output=True, timeout=15)
+            if test.returncode == 0:
+                return encoder
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+    
+    return 'libx264'
 
 
 class IOSConverter:
@@ -31,33 +105,38 @@ class IOSConverter:
     
     SUPPORTED_IMAGE_FORMATS = ['.heic', '.heif']
     SUPPORTED_VIDEO_FORMATS = ['.mov', '.m4v']
+    SUPPORTED_EXTENSIONS = frozenset(SUPPORTED_IMAGE_FORMATS + SUPPORTED_VIDEO_FORMATS)
+    X264_PRESETS = ['ultrafast', 'superfast', 'veryfast', 'faster', 'fast', 'medium', 'slow']
+    # 'none' leaves -tune off; 'film' suits real-world camera footage
+    X264_TUNES = ['film', 'animation', 'grain', 'stillimage', 'fastdecode', 'zerolatency', 'none']
+    # Codecs MP4 can hold as-is, so such inputs only need a new container
+    REMUX_VIDEO_CODECS = {'h264'}
+    REMUX_AUDIO_CODECS = {'aac'}
+    VIDEO_BATCH_SIZE = 8  # Max inputs per FFmpeg process in batch_convert_videos
+    # Max concurrent hardware encode sessions; consumer GPUs cap these
+    # (NVENC on GeForce allows only a few), and each output uses one
+    GPU_SESSIONS = 2
     
-    def __init__(self):
-        self.ffmpeg_path = self._find_ffmpeg()
+    # Hardware H.264 encoders in order of preference, with their quality options
+    HW_ENCODERS = {
+        'h264_nvenc': ['-preset', 'p4', '-cq', '23'],
+        'h264_qsv': ['-preset', 'veryfast', '-global_quality', '23'],
+        'h264_videotoolbox': ['-b:v', '6M'],
+        'h264_amf': ['-quality', 'balanced', '-rc', 'cqp', '-qp_i', '23', '-qp_p', '23'],
+    }
     
-    def _find_ffmpeg(self):
-        """Find ffmpeg executable"""
-        # Check if ffmpeg is in PATH
-        try:
-            result = subprocess.run(['ffmpeg', '-version'], 
-                                    capture_output=True, text=True)
-            if result.returncode == 0:
-                return 'ffmpeg'
-        except FileNotFoundError:
-            pass
-        
-        # Common installation paths on Windows
-        common_paths = [
-            r'C:\ffmpeg\bin\ffmpeg.exe',
-            r'C:\Program Files\ffmpeg\bin\ffmpeg.exe',
-            r'C:\Program Files (x86)\ffmpeg\bin\ffmpeg.exe',
-        ]
-        
-        for path in common_paths:
-            if os.path.exists(path):
-                return path
-        
-        return None
+    def __init__(self, preset='faster', png_level=1, threads=0, tune='film', force=False,
+                 h264_encoder=None):
+        self.ffmpeg_path = _find_ffmpeg()
+        self.preset = preset
+        self.tune = tune
+        self.force = force  # Re-convert even when the output is already up to date
+        self.png_level = png_level  # zlib level 0-9; 1 is fast, 6 is Pillow's default
+        self.threads = threads      # libx264 threads; 0 lets x264 use every core
+        if h264_encoder is None:  # Workers get the parent's choice instead of probing
+            h264_encoder = (_detect_h264_encoder(self.ffmpeg_path) if self.ffmpeg_path
+                            else 'libx264')
+        self.h264_encoder = h264_encoder
     
     def convert_heic_to_png(self, input_path, output_path=None, callback=None):
         """Convert HEIC/HEIF image to PNG"""
@@ -67,78 +146,341 @@ class IOSConverter:
         if not HEIF_SUPPORT:
             raise RuntimeError("pillow-heif is not installed. Run: pip install pillow-heif")
         
-        input_path = Path(input_path)
+        input_path = _as_path(input_path)
         if output_path is None:
             output_path = input_path.with_suffix('.png')
         else:
-            output_path = Path(output_path)
+            output_path = _as_path(output_path)
+        
+        if self._is_up_to_date(input_path, output_path):
+            if callback:
+                callback(f"↷ Skipped (up-to-date): {output_path.name}")
+            return output_path
         
         if callback:
             callback(f"Converting: {input_path.name} -> {output_path.name}")
         
-        # Open and convert the image
-        with Image.open(input_path) as img:
-            # Convert to RGB if necessary (HEIC might have alpha)
-            if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
-                # Keep transparency for PNG
-                img.save(output_path, 'PNG')
-            else:
-                img.convert('RGB').save(output_path, 'PNG')
+        # Decode with libheif and wrap its pixel buffer directly, so the
+        # image is not copied again by Image.open/convert before encoding
+        heif = pillow_heif.open_heif(input_path, convert_hdr_to_8bit=True)
+        if heif.mode in ('RGB', 'RGBA'):
+            # RGBA keeps transparency for PNG
+            img = Image.frombuffer(heif.mode, heif.size, heif.data,
+                                   'raw', heif.mode, heif.stride, 1)
+        else:
+            img = heif.to_pillow()
+        
+        # frombuffer images have no info, so carry the ICC profile (Display
+        # P3 on iPhones) over from the HEIF; to_pillow() images keep theirs
+        options = {}
+        icc_profile = heif.info.get('icc_profile') or img.info.get('icc_profile')
+        if icc_profile:
+            options['icc_profile'] = icc_profile
+        
+        # DEFLATE dominates PNG encode time; level 1 is several times
+        # faster than the default 6 for a modestly larger file
+        img.save(output_path, 'PNG', compress_level=self.png_level, optimize=False, **options)
         
         if callback:
             callback(f"✓ Completed: {output_path.name}")
         
         return output_path
     
-    def convert_mov_to_mp4(self, input_path, output_path=None, callback=None):
-        """Convert MOV video to MP4"""
-        if not self.ffmpeg_path:
-            raise RuntimeError("FFmpeg is not installed or not found in PATH.\n"
-                             "Please install FFmpeg from https://ffmpeg.org/download.html")
-        
-        input_path = Path(input_path)
+    def convert_mov_to_mp4(self, input_path, output_path=None, callback=None, preset=None,
+                           progress_callback=None, skip_up_to_date=True):
+        """Convert MOV video to MP4, optionally reporting progress as a 0-1 fraction"""
+        input_path = _as_path(input_path)
         if output_path is None:
             output_path = input_path.with_suffix('.mp4')
         else:
-            output_path = Path(output_path)
+            output_path = _as_path(output_path)
+        
+        if skip_up_to_date and self._is_up_to_date(input_path, output_path):
+            if callback:
+                callback(f"↷ Skipped (up-to-date): {output_path.name}")
+            return output_path
+        
+        # H.264/AAC only needs a new container, which PyAV does in-process
+        if AV_AVAILABLE:
+            try:
+                if self._remux_with_pyav(input_path, output_path):
+                    if callback:
+                        callback(f"✓ Remuxed: {input_path.name} -> {output_path.name}")
+                    return output_path
+            except Exception as e:
+                # Let FFmpeg try; it reports a proper error if the file is bad
+                if callback:
+                    callback(f"  PyAV remux failed ({e}), using FFmpeg")
+        
+        if not self.ffmpeg_path:
+            raise RuntimeError("FFmpeg is not installed or not found in PATH.\n"
+                             "Please install FFmpeg from https://ffmpeg.org/download.html")
         
         if callback:
             callback(f"Converting: {input_path.name} -> {output_path.name}")
         
-        # FFmpeg command for MOV to MP4 conversion
+        try:
+            # H.264/AAC already fits MP4, so try copying the streams first
+            returncode = None
+            if self._can_stream_copy(input_path):
+                cmd = [self.ffmpeg_path, '-i', str(input_path),
+                       '-c', 'copy', '-movflags', '+faststart',
+                       '-y', str(output_path)]
+                returncode, stderr = self._run_ffmpeg(cmd, progress_callback)
+            
+            if returncode != 0:
+                # FFmpeg command for MOV to MP4 conversion
+                cmd = self._video_command(input_path, output_path, preset, self.h264_encoder)
+                returncode, stderr = self._run_ffmpeg(cmd, progress_callback)
+            
+                # Hardware encoders can still fail on some inputs; retry on CPU
+                if returncode != 0 and self.h264_encoder != 'libx264':
+                    if callback:
+                        callback(f"  {self.h264_encoder} failed, retrying with libx264")
+                    cmd = self._video_command(input_path, output_path, preset, 'libx264')
+                    returncode, stderr = self._run_ffmpeg(cmd, progress_callback)
+            
+            if returncode != 0:
+                raise RuntimeError(f"FFmpeg error: {stderr}")
+        except Exception as e:
+            self._discard_output(output_path)
+            raise RuntimeError(f"Conversion failed: {str(e)}")
+        
+        if callback:
+            callback(f"✓ Completed: {output_path.name}")
+        
+        return output_path
+    
+    def _is_up_to_date(self, input_path, output_path):
+        """True if a non-empty output at least as new as the input exists"""
+        if self.force:
+            return False
+        try:
+            output_stat = os.stat(output_path)
+            return (output_stat.st_size > 0 and
+                    output_stat.st_mtime >= os.stat(input_path).st_mtime)
+        except OSError:
+            return False
+    
+    def _discard_output(self, output_path):
+        """Delete a partial output so _is_up_to_date doesn't take it as done"""
+        try:
+            os.remove(output_path)
+        except OSError:
+            pass
+    
+    def _remux_with_pyav(self, input_path, output_path):
+        """Copy H.264/AAC streams into an MP4 without re-encoding.
+        
+        Returns False, without writing anything, if the codecs need re-encoding.
+        A failed remux deletes its partial output before re-raising.
+        """
+        with av.open(str(input_path)) as source:
+            video = source.streams.video
+            audio = source.streams.audio
+            if not video or video[0].codec_context.name not in self.REMUX_VIDEO_CODECS:
+                return False
+            if audio and audio[0].codec_context.name not in self.REMUX_AUDIO_CODECS:
+                return False
+            
+            streams = [video[0]] + ([audio[0]] if audio else [])
+            try:
+                with av.open(str(output_path), 'w', options={'movflags': 'faststart'}) as target:
+                    out_streams = {stream.index: target.add_stream_from_template(stream)
+                                   for stream in streams}
+                    for packet in source.demux(streams):
+                        if packet.dts is None:
+                            continue  # Demuxer flush packet
+                        packet.stream = out_streams[packet.stream.index]
+                        target.mux(packet)
+            except BaseException:
+                self._discard_output(output_path)
+                raise
+        return True
+    
+    def _probe_codecs(self, input_path):
+        """Return (video codec, audio codec) of the first streams; None if absent"""
+        # 'ffmpeg -i' with no output prints the stream list and exits; this
+        # works with the bundled build, which has no ffprobe
+        try:
+            result = subprocess.run([self.ffmpeg_path, '-hide_banner', '-i', str(input_path)],
+                                    capture_output=True, text=True, timeout=30)
+        except (OSError, subprocess.TimeoutExpired):
+            return None, None
+        
+        codecs = {}
+        for kind, codec in _STREAM_RE.findall(result.stderr):
+            codecs.setdefault(kind, codec)
+        return codecs.get('Video'), codecs.get('Audio')
+    
+    def _can_stream_copy(self, input_path):
+        """True if the video can go into MP4 without re-encoding"""
+        video, audio = self._probe_codecs(input_path)
+        return (video in self.REMUX_VIDEO_CODECS and
+                (audio is None or audio in self.REMUX_AUDIO_CODECS))
+    
+    def _run_ffmpeg(self, cmd, progress_callback=None):
+        """Run an FFmpeg command and return (returncode, stderr)"""
+        if progress_callback is None:
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            return result.returncode, result.stderr
+        
+        # Machine-readable key=value progress on stdout, no console stats
+        cmd = [cmd[0], '-progress', 'pipe:1', '-nostats', *cmd[1:]]
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                text=True, bufsize=1)
+        
+        # stderr is read on a thread so neither pipe can fill up and block FFmpeg;
+        # its banner also carries the input duration
+        stderr_lines = []
+        reader = threading.Thread(target=stderr_lines.extend, args=(proc.stderr,))
+        reader.daemon = True
+        reader.start()
+        
+        duration_us = None
+        for line in proc.stdout:
+            if duration_us is None:
+                duration_us = _parse_duration_us(stderr_lines)
+            # out_time_ms is in microseconds despite its name
+            if duration_us and line.startswith('out_time_ms='):
+                value = line.split('=', 1)[1].strip()
+                if value.isdigit():
+                    progress_callback(min(int(value) / duration_us, 1.0))
+        
+        proc.wait()
+        reader.join()
+        return proc.returncode, ''.join(stderr_lines)
+    
+    def _video_command(self, input_path, output_path, preset, encoder):
+        """Full FFmpeg command for a single video"""
+        cmd = [self.ffmpeg_path]
+        if encoder != 'libx264':
+            cmd.extend(['-hwaccel', 'auto'])  # Hardware decode where possible
+        cmd.extend(['-i', str(input_path)])
+        cmd.extend(self._video_output_args(preset, encoder))
+        cmd.extend(['-y', str(output_path)])  # Overwrite output
+        return cmd
+    
+    def _video_output_args(self, preset=None, encoder='libx264'):
+        """FFmpeg encoding options for one MP4 output"""
         # Using H.264 codec for wide compatibility
-        cmd = [
-            self.ffmpeg_path,
-            '-i', str(input_path),
-            '-c:v', 'libx264',      # Video codec
-            '-preset', 'medium',     # Encoding speed/quality balance
-            '-crf', '23',            # Quality (lower = better, 18-28 is good range)
+        if encoder == 'libx264':
+            video_args = [
+                '-preset', preset or self.preset,  # Encoding speed/quality balance
+                '-crf', '23',        # Quality (lower = better, 18-28 is good range)
+                '-threads', str(self.threads),  # Encoder threads (0 = auto)
+            ]
+            if self.tune != 'none':
+                video_args += ['-tune', self.tune]  # Content-specific tuning
+        else:
+            video_args = self.HW_ENCODERS[encoder]
+        
+        return [
+            '-c:v', encoder,         # Video codec
+            *video_args,
             '-c:a', 'aac',           # Audio codec
             '-b:a', '128k',          # Audio bitrate
             '-movflags', '+faststart',  # Enable streaming
-            '-y',                    # Overwrite output
-            str(output_path)
         ]
+    
+    def batch_convert_videos(self, input_paths, output_dir=None, callback=None, preset=None):
+        """Convert videos in groups, one FFmpeg process per group"""
+        if not self.ffmpeg_path:
+            raise RuntimeError("FFmpeg is not installed or not found in PATH.\n"
+                             "Please install FFmpeg from https://ffmpeg.org/download.html")
+        
+        # Leave up-to-date outputs out of the groups so they cost only a stat()
+        results = [None] * len(input_paths)
+        pending = []
+        for i, path in enumerate(input_paths):
+            output_path = self._video_output_path(path, output_dir)
+            if self._is_up_to_date(path, output_path):
+                if callback:
+                    callback(f"↷ Skipped (up-to-date): {output_path.name}")
+                results[i] = ('success', path, output_path)
+            else:
+                pending.append(i)
+        
+        # Every output in a group is a hardware session of its own
+        group_size = self.VIDEO_BATCH_SIZE
+        if self.h264_encoder != 'libx264':
+            group_size = min(group_size, self.GPU_SESSIONS)
+        for start in range(0, len(pending), group_size):
+            group = pending[start:start + group_size]
+            group_results = self._convert_video_group([input_paths[i] for i in group],
+                                                      output_dir, callback, preset)
+            for i, result in zip(group, group_results):
+                results[i] = result
+        return results
+    
+    def _video_output_path(self, input_path, output_dir=None):
+        """MP4 path for a video converted in batch"""
+        input_path = _as_path(input_path)
+        return _as_path(output_dir or input_path.parent) / (input_path.stem + '.mp4')
+    
+    def _convert_video_group(self, input_paths, output_dir, callback, preset):
+        """Encode several videos with a single FFmpeg invocation"""
+        cmd = [self.ffmpeg_path, '-y']
+        output_paths = []
+        
+        for path in input_paths:
+            if self.h264_encoder != 'libx264':
+                cmd.extend(['-hwaccel', 'auto'])  # Input option; applies to the next -i only
+            cmd.extend(['-i', str(path)])
+        
+        # One output per input; audio is optional so silent clips still map
+        for i, path in enumerate(input_paths):
+            output_path = self._video_output_path(path, output_dir)
+            output_paths.append(output_path)
+            
+            if callback:
+                callback(f"Converting: {os.path.basename(path)} -> {output_path.name}")
+            
+            cmd.extend(['-map', f'{i}:v:0', '-map', f'{i}:a?'])
+            if self._can_stream_copy(path):
+                cmd.extend(['-c', 'copy', '-movflags', '+faststart'])
+            else:
+                cmd.extend(self._video_output_args(preset, self.h264_encoder))
+            cmd.append(str(output_path))
         
         try:
             result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode != 0:
-                raise RuntimeError(f"FFmpeg error: {result.stderr}")
-        except Exception as e:
-            raise RuntimeError(f"Conversion failed: {str(e)}")
+            ok = result.returncode == 0
+        except OSError:
+            ok = False
         
-        if callback:
-            callback(f"✓ Completed: {output_path.name}")
+        if ok:
+            if callback:
+                for output_path in output_paths:
+                    callback(f"✓ Completed: {output_path.name}")
+            return [('success', path, output_path)
+                    for path, output_path in zip(input_paths, output_paths)]
         
-        return output_path
+        # A single bad input fails the whole group, so retry file by file.
+        # The group may have left truncated outputs that look up to date,
+        # so drop them and convert every file again
+        results = []
+        for path, output_path in zip(input_paths, output_paths):
+            self._discard_output(output_path)
+            try:
+                result = self.convert_mov_to_mp4(path, output_path, callback, preset,
+                                                 skip_up_to_date=False)
+                results.append(('success', path, result))
+            except Exception as e:
+                if callback:
+                    callback(f"✗ Failed: {os.path.basename(path)} - {str(e)}")
+                results.append(('error', path, str(e)))
+        return results
     
-    def convert_file(self, input_path, output_dir=None, callback=None):
+    def convert_file(self, input_path, output_dir=None, callback=None, preset=None,
+                     progress_callback=None):
         """Convert a single file based on its extension"""
-        input_path = Path(input_path)
+        # Build the Path objects once; the converters below reuse them as-is
+        input_path = _as_path(input_path)
         ext = input_path.suffix.lower()
         
         if output_dir:
-            output_dir = Path(output_dir)
+            output_dir = _as_path(output_dir)
         else:
             output_dir = input_path.parent
         
@@ -147,22 +489,199 @@ class IOSConverter:
             return self.convert_heic_to_png(input_path, output_path, callback)
         elif ext in self.SUPPORTED_VIDEO_FORMATS:
             output_path = output_dir / (input_path.stem + '.mp4')
-            return self.convert_mov_to_mp4(input_path, output_path, callback)
+            return self.convert_mov_to_mp4(input_path, output_path, callback, preset,
+                                           progress_callback)
         else:
             raise ValueError(f"Unsupported format: {ext}")
     
-    def batch_convert(self, input_paths, output_dir=None, callback=None):
-        """Convert multiple files"""
-        results = []
-        for path in input_paths:
-            try:
-                result = self.convert_file(path, output_dir, callback)
-                results.append(('success', path, result))
-            except Exception as e:
+    def batch_convert(self, input_paths, output_dir=None, callback=None,
+                      max_workers=None, preset=None):
+        """Convert multiple files in parallel worker processes"""
+        log_queue = multiprocessing.Queue() if callback else None
+        results = [None] * len(input_paths)
+        
+        # Videos are grouped into shared FFmpeg processes; without FFmpeg
+        # they go through the pool so each one reports its own error
+        video_indexes = []
+        if self.ffmpeg_path:
+            video_indexes = [i for i, path in enumerate(input_paths)
+                             if os.path.splitext(path)[1].lower() in self.SUPPORTED_VIDEO_FORMATS]
+        skip = set(video_indexes)
+        
+        pool_size = max_workers or max(1, min(os.cpu_count() or 1,
+                                              len(input_paths) - len(video_indexes)))
+        with ProcessPoolExecutor(max_workers=pool_size,
+                                 initializer=_init_worker,
+                                 initargs=(log_queue, self._worker_options(preset))) as executor:
+            futures = {executor.submit(_convert_one, path, output_dir): i
+                       for i, path in enumerate(input_paths) if i not in skip}
+            
+            # Encode videos here while the pool works through the images
+            if video_indexes:
+                video_results = self.batch_convert_videos(
+                    [input_paths[i] for i in video_indexes], output_dir, callback, preset)
+                for i, result in zip(video_indexes, video_results):
+                    results[i] = result
+            
+            # Forward worker messages as files finish
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
                 if callback:
-                    callback(f"✗ Failed: {Path(path).name} - {str(e)}")
-                results.append(('error', path, str(e)))
+                    _drain_queue(log_queue, callback)
+        
+        if callback:
+            _drain_queue(log_queue, callback)
+        
+        # Results are kept in input order
         return results
+    
+    def _plan_pools(self, input_paths):
+        """Split files into (images, videos, image workers, video workers).
+        
+        Each pool gets no more workers than it has files, so a lone video
+        runs in one worker with every core to itself. Hardware encoding is
+        also held to GPU_SESSIONS videos at once.
+        """
+        videos = [path for path in input_paths
+                  if os.path.splitext(path)[1].lower() in self.SUPPORTED_VIDEO_FORMATS]
+        video_set = set(videos)
+        images = [path for path in input_paths if path not in video_set]
+        
+        cpu_count = os.cpu_count() or 1
+        video_workers = min(cpu_count, len(videos))
+        if self.h264_encoder != 'libx264':
+            video_workers = min(video_workers, self.GPU_SESSIONS)
+        return images, videos, min(cpu_count, len(images)), video_workers
+    
+    def _worker_options(self, preset=None, parallel_videos=1):
+        """Settings for the converters built in worker processes"""
+        # Split the cores between the videos encoding at once so they don't
+        # oversubscribe; a single video keeps the configured threads (0 = all)
+        threads = (max(1, (os.cpu_count() or 1) // parallel_videos)
+                   if parallel_videos > 1 else self.threads)
+        return {'preset': preset or self.preset, 'png_level': self.png_level,
+                'threads': threads, 'tune': self.tune, 'force': self.force,
+                'h264_encoder': self.h264_encoder}
+
+
+# Per-process state for batch conversion workers
+_worker_converter = None
+_worker_log_queue = None
+_worker_report_progress = False
+
+
+def _init_worker(log_queue=None, options=None, report_progress=False, cpu_counter=None):
+    """Create the converter once per worker process"""
+    global _worker_converter, _worker_log_queue, _worker_report_progress
+    if cpu_counter is not None:
+        # Each worker takes the next CPU so its decode buffers stay in that core's cache
+        with cpu_counter.get_lock():
+            index = cpu_counter.value
+            cpu_counter.value += 1
+        _pin_to_cpu(index)
+    
+    _worker_converter = IOSConverter(**(options or {}))
+    _worker_log_queue = log_queue
+    _worker_report_progress = report_progress
+
+
+def _pin_to_cpu(index):
+    """Restrict this process to one CPU where the OS supports it"""
+    try:
+        if hasattr(os, 'sched_setaffinity'):  # Linux
+            cpus = sorted(os.sched_getaffinity(0))
+            os.sched_setaffinity(0, {cpus[index % len(cpus)]})
+        elif sys.platform == 'win32':
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            cpu = index % (os.cpu_count() or 1)
+            kernel32.SetProcessAffinityMask(kernel32.GetCurrentProcess(),
+                                            ctypes.c_size_t(1 << cpu))
+        # macOS has no affinity API; leave scheduling to the kernel
+    except (OSError, AttributeError, ValueError):
+        pass  # Pinning is an optimization only
+
+
+def _convert_one(input_path, output_dir=None):
+    """Convert a single file inside a worker process"""
+    callback = _worker_log_queue.put if _worker_log_queue is not None else None
+    
+    # Progress travels on the log queue as (input_path, fraction) tuples
+    progress_callback = None
+    if callback and _worker_report_progress:
+        progress_callback = lambda fraction: callback((input_path, fraction))
+    
+    try:
+        result = _worker_converter.convert_file(input_path, output_dir, callback,
+                                                progress_callback=progress_callback)
+        return ('success', input_path, result)
+    except Exception as e:
+        if callback:
+            callback(f"✗ Failed: {os.path.basename(input_path)} - {str(e)}")
+        return ('error', input_path, str(e))
+
+
+# Same brands as the CLI's IOSConverter.HEIF_BRANDS (tests keep them in sync)
+_HEIF_BRANDS = frozenset([b'heic', b'heix', b'heim', b'heis', b'hevc', b'hevx',
+                          b'mif1', b'msf1'])
+_STREAM_RE = re.compile(r'Stream #\d+:\d+.*?: (Video|Audio): (\w+)')
+_DURATION_RE = re.compile(r'Duration: (\d+):(\d+):(\d+(?:\.\d+)?)')
+
+
+def _as_path(path):
+    """Return path as a Path, without re-parsing one that already is"""
+    return path if isinstance(path, Path) else Path(path)
+
+
+def _parse_duration_us(stderr_lines):
+    """Input duration in microseconds from FFmpeg's banner, or None"""
+    for line in stderr_lines:
+        match = _DURATION_RE.search(line)
+        if match:
+            hours, minutes, seconds = match.groups()
+            return int((int(hours) * 3600 + int(minutes) * 60 + float(seconds)) * 1_000_000)
+    return None
+
+
+def _iter_supported_files(directory, extensions):
+    """Yield paths of files with a supported extension, recursively"""
+    try:
+        entries = os.scandir(directory)
+    except OSError:
+        return  # Unreadable folder; skip it like os.walk does
+    
+    with entries:
+        for entry in entries:
+            name = entry.name
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_supported_files(entry.path, extensions)
+            else:
+                ext = name[name.rfind('.'):].lower()
+                if ext not in extensions:
+                    continue
+                # Drop renamed or truncated files before they reach a worker
+                if ext in IOSConverter.SUPPORTED_IMAGE_FORMATS and not _is_heic(entry.path):
+                    continue
+                yield entry.path
+
+
+def _is_heic(path):
+    """Check the ISO BMFF 'ftyp' box for a HEIF brand"""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(12)
+    except OSError:
+        return False
+    return header[4:8] == b'ftyp' and header[8:12] in _HEIF_BRANDS
+
+
+def _drain_queue(log_queue, callback):
+    """Pass all pending queue messages to callback without blocking"""
+    while True:
+        try:
+            callback(log_queue.get_nowait())
+        except queue.Empty:
+            break
 
 
 class ConverterGUI:
@@ -171,6 +690,12 @@ class ConverterGUI:
     def __init__(self):
         self.converter = IOSConverter()
         self.files_to_convert = []
+        self._log_queue = None
+        self._log_pending = deque()  # Messages waiting for the next _flush_log
+        self._converting = False
+        self._completed = 0
+        self._file_progress = {}  # input path -> fraction for in-flight videos
+        self._finished = set()
         
         self.root = Tk()
         self.root.title("iOS Format Converter")
@@ -245,6 +770,41 @@ class ConverterGUI:
         
         self.output_dir = None
         
+        # Video preset frame
+        preset_frame = Frame(main_frame)
+        preset_frame.pack(fill='x', pady=(0, 10))
+        
+        Label(preset_frame, text="Video Preset:", 
+              font=('Arial', 10)).pack(side='left')
+        
+        self.preset_var = StringVar(value=self.converter.preset)
+        self.preset_var.trace_add('write', self._on_preset_change)
+        OptionMenu(preset_frame, self.preset_var,
+                   *self.converter.X264_PRESETS).pack(side='left', padx=10)
+        
+        Label(preset_frame, text="Tune:", 
+              font=('Arial', 10)).pack(side='left', padx=(20, 0))
+        
+        self.tune_var = StringVar(value=self.converter.tune)
+        self.tune_var.trace_add('write', self._on_tune_change)
+        OptionMenu(preset_frame, self.tune_var,
+                   *self.converter.X264_TUNES).pack(side='left', padx=10)
+        
+        Label(preset_frame, text="PNG Compression:", 
+              font=('Arial', 10)).pack(side='left', padx=(20, 0))
+        
+        # 0-9: higher is smaller but slower to encode
+        self.png_level = IntVar(value=self.converter.png_level)
+        self.png_level.trace_add('write', self._on_png_level_change)
+        Spinbox(preset_frame, from_=0, to=9, width=3,
+                textvariable=self.png_level).pack(side='left', padx=10)
+        
+        # Off: files whose output is newer than the source are skipped
+        self.force_var = BooleanVar(value=self.converter.force)
+        self.force_var.trace_add('write', self._on_force_change)
+        Checkbutton(preset_frame, text="Re-convert existing",
+                    variable=self.force_var).pack(side='left', padx=(20, 0))
+        
         # File list
         list_frame = Frame(main_frame)
         list_frame.pack(fill='both', expand=True, pady=10)
@@ -267,8 +827,9 @@ class ConverterGUI:
         Label(log_frame, text="Conversion Log:", 
               font=('Arial', 10, 'bold')).pack(anchor='w')
         
+        # Read-only between writes so typing can't interleave with the log
         self.log_area = ScrolledText(log_frame, height=6, width=70,
-                                      font=('Consolas', 9))
+                                      font=('Consolas', 9), state='disabled')
         self.log_area.pack(fill='both', expand=True, pady=5)
         
         # Convert button
@@ -292,17 +853,34 @@ class ConverterGUI:
         if not self.converter.ffmpeg_path:
             warnings.append("⚠️ FFmpeg not found (needed for video conversion)")
         
+        if PILLOW_SIMD:
+            self._log("⚡ Pillow-SIMD detected")
+        
         if warnings:
             self._log("\n".join(warnings))
             self._log("Some features may be unavailable.\n")
         else:
             self._log("✓ All dependencies are available.\n")
+        
+        if self.converter.h264_encoder != 'libx264':
+            self._log(f"⚡ Hardware video encoding: {self.converter.h264_encoder}\n")
     
     def _log(self, message):
-        """Add message to log area"""
-        self.log_area.insert('end', message + '\n')
+        """Queue message for the log area; bursts are written in one go"""
+        if not self._log_pending:
+            self.root.after(50, self._flush_log)
+        self._log_pending.append(message)
+    
+    def _flush_log(self):
+        """Write all queued messages with a single insert (runs in Tk main loop)"""
+        if not self._log_pending:
+            return
+        messages = '\n'.join(self._log_pending)
+        self._log_pending.clear()
+        self.log_area.configure(state='normal')
+        self.log_area.insert('end', messages + '\n')
+        self.log_area.configure(state='disabled')
         self.log_area.see('end')
-        self.root.update_idletasks()
     
     def _update_file_list(self):
         """Update the file list display"""
@@ -334,15 +912,48 @@ class ConverterGUI:
         folder = filedialog.askdirectory(title="Select Folder with iOS Files")
         
         if folder:
-            supported_exts = (self.converter.SUPPORTED_IMAGE_FORMATS + 
-                           self.converter.SUPPORTED_VIDEO_FORMATS)
-            
-            for root, dirs, files in os.walk(folder):
-                for file in files:
-                    if Path(file).suffix.lower() in supported_exts:
-                        self.files_to_convert.append(os.path.join(root, file))
-            
-            self._update_file_list()
+            # Scan in the background so large libraries don't freeze the UI
+            self.status_var.set("Scanning folder...")
+            thread = threading.Thread(target=self._scan_folder, args=(folder,))
+            thread.daemon = True
+            thread.start()
+    
+    def _scan_folder(self, folder):
+        """Find supported files in folder (runs in separate thread)"""
+        batch = []
+        for path in _iter_supported_files(folder, self.converter.SUPPORTED_EXTENSIONS):
+            batch.append(path)
+            if len(batch) == 100:
+                self.root.after(0, self._extend_files, batch)
+                batch = []
+        
+        self.root.after(0, self._extend_files, batch)
+    
+    def _extend_files(self, paths):
+        """Append scanned files to the list without redrawing existing entries"""
+        self.files_to_convert.extend(paths)
+        if paths:
+            self.file_list.insert('end', '\n'.join(paths) + '\n')
+        self.status_var.set(f"{len(self.files_to_convert)} file(s) selected")
+    
+    def _on_preset_change(self, *args):
+        """Apply the selected x264 preset to the converter"""
+        self.converter.preset = self.preset_var.get()
+    
+    def _on_tune_change(self, *args):
+        """Apply the selected x264 tune to the converter"""
+        self.converter.tune = self.tune_var.get()
+    
+    def _on_force_change(self, *args):
+        """Apply the re-convert setting to the converter"""
+        self.converter.force = self.force_var.get()
+    
+    def _on_png_level_change(self, *args):
+        """Apply the selected PNG compression level to the converter"""
+        try:
+            self.converter.png_level = self.png_level.get()
+        except Exception:
+            pass  # Spinbox is mid-edit (empty or non-numeric)
     
     def _select_output_dir(self):
         """Select output directory"""
@@ -367,44 +978,100 @@ class ConverterGUI:
         self.progress['value'] = 0
         self.progress['maximum'] = len(self.files_to_convert)
         
+        # Worker processes report log messages and progress through this queue
+        self._log_queue = multiprocessing.Queue()
+        self._converting = True
+        self._completed = 0
+        self._file_progress = {}
+        self._finished = set()
+        self.root.after(100, self._drain_log_queue)
+        
         # Run conversion in separate thread
         thread = threading.Thread(target=self._convert_files)
         thread.daemon = True
         thread.start()
     
     def _convert_files(self):
-        """Convert all files (runs in separate thread)"""
-        total = len(self.files_to_convert)
+        """Convert all files in process pools (runs in separate thread)"""
         success = 0
         failed = 0
         
-        for i, file_path in enumerate(self.files_to_convert):
-            try:
-                self.converter.convert_file(
-                    file_path, 
-                    self.output_dir,
-                    callback=lambda msg: self.root.after(0, self._log, msg)
-                )
-                success += 1
-            except Exception as e:
-                self.root.after(0, self._log, f"✗ Error: {Path(file_path).name} - {str(e)}")
-                failed += 1
+        # Images and videos get separate pools, each no larger than its
+        # share of the files, so the video encodes' thread split follows
+        # how many videos really run at once
+        images, videos, image_workers, video_workers = \
+            self.converter._plan_pools(self.files_to_convert)
+        # Only image workers pin: a pinned video worker would confine its
+        # FFmpeg child, and all of its encoder threads, to a single core
+        cpu_counter = multiprocessing.Value('i', 0)  # Each image worker pins to the next CPU
+        
+        with ExitStack() as stack:
+            futures = []
+            if images:
+                image_pool = stack.enter_context(ProcessPoolExecutor(
+                    max_workers=image_workers, initializer=_init_worker,
+                    initargs=(self._log_queue, self.converter._worker_options(),
+                              True, cpu_counter)))
+                futures += [image_pool.submit(_convert_one, file_path, self.output_dir)
+                            for file_path in images]
+            if videos:
+                video_pool = stack.enter_context(ProcessPoolExecutor(
+                    max_workers=video_workers, initializer=_init_worker,
+                    initargs=(self._log_queue,
+                              self.converter._worker_options(parallel_videos=video_workers),
+                              True, None)))
+                futures += [video_pool.submit(_convert_one, file_path, self.output_dir)
+                            for file_path in videos]
             
-            # Update progress
-            self.root.after(0, self._update_progress, i + 1)
+            for i, future in enumerate(as_completed(futures), 1):
+                status, file_path, _ = future.result()
+                if status == 'success':
+                    success += 1
+                else:
+                    failed += 1
+                
+                # Update progress
+                self.root.after(0, self._update_progress, i, file_path)
         
         # Conversion complete
         self.root.after(0, self._conversion_complete, success, failed)
     
-    def _update_progress(self, value):
+    def _drain_log_queue(self):
+        """Move worker log messages into the log area (runs in Tk main loop)"""
+        _drain_queue(self._log_queue, self._handle_worker_message)
+        if self._converting:
+            self.root.after(100, self._drain_log_queue)
+    
+    def _handle_worker_message(self, message):
+        """Log a worker message, or record an (input path, fraction) progress update"""
+        if isinstance(message, tuple):
+            file_path, fraction = message
+            if file_path not in self._finished:
+                self._file_progress[file_path] = fraction
+                self._refresh_progress()
+        else:
+            self._log(message)
+    
+    def _update_progress(self, value, file_path=None):
         """Update progress bar"""
-        self.progress['value'] = value
+        self._completed = value
+        # Finished files count in full; ignore any late progress for them
+        self._finished.add(file_path)
+        self._file_progress.pop(file_path, None)
+        self._refresh_progress()
+    
+    def _refresh_progress(self):
+        """Show completed files plus the partial progress of running videos"""
+        self.progress['value'] = self._completed + sum(self._file_progress.values())
     
     def _conversion_complete(self, success, failed):
         """Called when conversion is complete"""
+        self._converting = False
+        self._drain_log_queue()
         self.convert_btn.config(state='normal')
         self._log(f"\n{'='*40}")
         self._log(f"Conversion Complete: {success} succeeded, {failed} failed")
+        self._flush_log()  # Show the summary before the dialog opens
         
         if failed == 0:
             messagebox.showinfo("Success", f"Successfully converted {success} file(s)!")
@@ -421,16 +1088,14 @@ def main():
     """Main entry point"""
     # Check for command line arguments
     if len(sys.argv) > 1:
-        # Command line mode
-        converter = IOSConverter()
+        # Command line mode; --force re-converts files that are up to date
+        args = sys.argv[1:]
+        converter = IOSConverter(force='--force' in args)
         
-        for file_path in sys.argv[1:]:
+        for file_path in (arg for arg in args if arg != '--force'):
             if os.path.exists(file_path):
                 try:
-                    result = converter.convert_file(
-                        file_path,
-                        callback=lambda msg: print(msg)
-                    )
+                    result = converter.convert_file(file_path, callback=print)
                     print(f"Output: {result}")
                 except Exception as e:
                     print(f"Error converting {file_path}: {e}")
@@ -27,29 +27,80 @@ import subprocess
 import argparse
 import logging
 import platform
+import re
+import shutil
+import functools
+import importlib.util
+import threading
+import multiprocessing
+import logging.handlers
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, List
+from typing import Iterator, Optional, List, Sequence, Tuple
 
 # =============================================================================
 # DEPENDENCY INITIALIZATION
 # =============================================================================
 
-# Try to import pillow-heif for HEIC support
-# This must be done before importing PIL.Image to register the HEIF opener
-try:
-    from pillow_heif import register_heif_opener
-    register_heif_opener()
-    HEIF_SUPPORT = True
-except ImportError:
-    HEIF_SUPPORT = False
+# Pillow and pillow-heif are only located here, not imported: PIL alone
+# takes a few hundred milliseconds to load, which --check and video-only
+# runs (and every pool worker) would otherwise pay. _load_pillow() imports
+# them on first use.
+PIL_AVAILABLE = importlib.util.find_spec('PIL') is not None
+HEIF_SUPPORT = importlib.util.find_spec('pillow_heif') is not None
 
-# Import PIL for image processing
-try:
+# Set by _load_pillow()
+Image = None
+pillow_heif = None
+PILLOW_SIMD = False
+ZLIB_NG = False
+
+
+@functools.lru_cache(maxsize=1)
+def _load_pillow() -> None:
+    """
+    Import Pillow and pillow-heif and register the HEIF opener.
+    
+    Only runs once per process; later calls return immediately.
+    
+    Raises:
+        ImportError: If Pillow or pillow-heif can't be imported
+    """
+    global Image, pillow_heif, PILLOW_SIMD, ZLIB_NG
+    
+    # pillow-heif must register its opener before Image.open sees a HEIC
+    import pillow_heif
+    pillow_heif.register_heif_opener()
+    
+    import PIL
     from PIL import Image
-    PIL_AVAILABLE = True
+    # Pillow-SIMD is a drop-in fork with SSE4/AVX2 pixel kernels; its
+    # releases are versioned as X.Y.Z.postN
+    PILLOW_SIMD = '.post' in PIL.__version__
+    # zlib-ng speeds up PNG's DEFLATE step; recent Pillow wheels ship it
+    try:
+        from PIL import features
+        ZLIB_NG = bool(features.check_feature('zlib_ng'))
+    except (ImportError, ValueError):
+        ZLIB_NG = False
+
+# Optional progress bar for batch conversion
+try:
+    from tqdm import tqdm
+    TQDM_AVAILABLE = True
 except ImportError:
-    PIL_AVAILABLE = False
+    TQDM_AVAILABLE = False
+
+# Stream lines in FFmpeg's input report, e.g.
+# "Stream #0:0[0x1](und): Video: h264 (High) (avc1 / 0x31637661), ..."
+_STREAM_RE = re.compile(r'Stream #\d+:\d+.*?: (Video|Audio): (\w+)')
+# and its length, e.g. "Duration: 00:00:03.20, start: 0.000000, ..."
+_DURATION_RE = re.compile(r'Duration: (\d+):(\d\d):(\d\d(?:\.\d+)?)')
+# The pixel format follows a video stream's codec, e.g. "Video: hevc (Main 10)
+# (hvc1 / 0x31637668), yuv420p10le(tv, bt2020nc/bt2020/arib-std-b67), ..."
+_PIX_FMT_RE = re.compile(r'Stream #\d+:\d+.*?: Video: [^,\n]*, (\w+)')
 
 # =============================================================================
 # LOGGING CONFIGURATION
@@ -130,7 +181,23 @@ class IOSConverter:
     Attributes:
         SUPPORTED_IMAGE_FORMATS (list): List of supported image extensions
         SUPPORTED_VIDEO_FORMATS (list): List of supported video extensions
+        IMAGE_EXTENSIONS (frozenset): Image extensions, for lookups
+        VIDEO_EXTENSIONS (frozenset): Video extensions, for lookups
+        SUPPORTED_EXTENSIONS (frozenset): All supported extensions, for lookups
+        SUPPORTED_SUFFIXES (tuple): All supported extensions, for str.endswith
+        X264_PRESETS (list): libx264 presets accepted for CPU encoding
+        X264_TUNES (list): libx264 tunes accepted for CPU encoding
+        NVENC_PRESETS (list): NVENC presets accepted for GPU encoding
         ffmpeg_path (str|None): Path to FFmpeg executable, None if not found
+        preset (str): libx264 preset used for CPU encoding
+        tune (str|None): libx264 tune used for CPU encoding, None for none
+        nvenc_preset (str): NVENC preset used with h264_nvenc
+        crf (int): libx264 constant rate factor, lower is higher quality
+        png_level (int): zlib compression level (0-9) for PNG output
+        image_format (str): Output format for images, 'png' or 'webp'
+        ffmpeg_threads (int): libx264 thread count, 0 lets FFmpeg decide
+        stream_copy (bool): Remux H.264/AAC videos instead of re-encoding
+        oxipng_path (str|None): oxipng used to shrink PNGs, None if disabled
     
     Example:
         >>> converter = IOSConverter()
@@ -141,8 +208,91 @@ class IOSConverter:
     # Supported file extensions (lowercase)
     SUPPORTED_IMAGE_FORMATS: List[str] = ['.heic', '.heif']
     SUPPORTED_VIDEO_FORMATS: List[str] = ['.mov', '.m4v']
-    
-    def __init__(self) -> None:
+    IMAGE_EXTENSIONS: frozenset = frozenset(SUPPORTED_IMAGE_FORMATS)
+    VIDEO_EXTENSIONS: frozenset = frozenset(SUPPORTED_VIDEO_FORMATS)
+    SUPPORTED_EXTENSIONS: frozenset = IMAGE_EXTENSIONS | VIDEO_EXTENSIONS
+    SUPPORTED_SUFFIXES: Tuple[str, ...] = tuple(SUPPORTED_IMAGE_FORMATS + SUPPORTED_VIDEO_FORMATS)
+    IMAGE_SUFFIXES: Tuple[str, ...] = tuple(SUPPORTED_IMAGE_FORMATS)
+    VIDEO_SUFFIXES: Tuple[str, ...] = tuple(SUPPORTED_VIDEO_FORMATS)
+    
+    # Hardware H.264 encoders by --hwaccel name, in detection priority order
+    HW_ENCODERS: dict = {
+        'nvenc': 'h264_nvenc',
+        'amf': 'h264_amf',
+        'qsv': 'h264_qsv',
+        'vt': 'h264_videotoolbox',
+    }
+    
+    # Decoders that hand frames straight to each hardware encoder in GPU
+    # memory, as (-hwaccel, -hwaccel_output_format)
+    HW_DECODERS: dict = {
+        'h264_nvenc': ('cuda', 'cuda'),
+        'h264_qsv': ('qsv', 'qsv'),
+        'h264_amf': ('d3d11va', 'd3d11'),  # Windows only
+    }
+    
+    # Codecs MP4 can hold as-is; such videos are remuxed, not re-encoded
+    REMUX_VIDEO_CODECS: frozenset = frozenset({'h264'})
+    REMUX_AUDIO_CODECS: frozenset = frozenset({'aac'})
+    
+    # Threads listing folders at once in scan_directory
+    SCAN_WORKERS: int = 16
+    
+    # Folders scan_directory never enters: macOS archive resource forks
+    # and Synology thumbnails. Names starting with '.' are skipped too
+    SKIP_DIRS: frozenset = frozenset({'__MACOSX', '@eaDir'})
+    
+    # File signatures checked by scan_directory(verify=True): the 'ftyp'
+    # brand of a HEIF image, and the first top-level atom of a QuickTime
+    # or MP4 file (older MOVs don't start with 'ftyp')
+    HEIF_BRANDS: frozenset = frozenset({
+        b'heic', b'heix', b'heim', b'heis', b'hevc', b'hevx', b'mif1', b'msf1',
+    })
+    VIDEO_ATOMS: frozenset = frozenset({
+        b'ftyp', b'moov', b'mdat', b'wide', b'free', b'skip', b'pnot',
+    })
+    
+    # Clips shorter than this (seconds) use constant-QP hardware encoding
+    SHORT_CLIP_SECONDS: float = 10.0
+    
+    # Max videos encoded by one FFmpeg process in convert_mov_batch
+    VIDEO_BATCH_SIZE: int = 8
+    
+    # Max concurrent hardware encode sessions; consumer GPUs cap these
+    # (NVENC on GeForce allows only a few), and each output uses one
+    GPU_SESSIONS: int = 2
+    
+    # Lossless output formats for images
+    IMAGE_OUTPUT_FORMATS: List[str] = ['png', 'webp']
+    
+    # libx264 presets, fastest first
+    X264_PRESETS: List[str] = [
+        'ultrafast', 'superfast', 'veryfast', 'faster',
+        'fast', 'medium', 'slow', 'slower', 'veryslow',
+    ]
+    
+    # NVENC presets, fastest first
+    NVENC_PRESETS: List[str] = ['p1', 'p2', 'p3', 'p4', 'p5', 'p6', 'p7']
+    
+    # libx264 content tunes; 'fastdecode' also lightens the encode a little
+    X264_TUNES: List[str] = [
+        'film', 'animation', 'grain', 'stillimage', 'fastdecode', 'zerolatency',
+    ]
+    
+    def __init__(
+        self,
+        enable_gpu: bool = True,
+        hw_encoder: Optional[str] = None,
+        preset: str = 'faster',
+        crf: int = 23,
+        png_level: int = 1,
+        ffmpeg_threads: int = 0,
+        stream_copy: bool = True,
+        optimize_png: bool = False,
+        image_format: str = 'png',
+        tune: Optional[str] = None,
+        nvenc_preset: str = 'p2'
+    ) -> None:
         """
         Initialize the converter and locate FFmpeg.
         
@@ -151,9 +301,51 @@ class IOSConverter:
         2. Local ffmpeg_bin folder (development)
         3. System PATH
         4. Common installation directories
+        
+        Args:
+            enable_gpu: If False, skip GPU detection and always encode on CPU
+            hw_encoder: Only test this FFmpeg encoder (e.g. 'h264_nvenc')
+                        instead of every known hardware encoder
+            preset: libx264 preset for CPU encoding. 'faster' is roughly
+                    2-3x quicker than 'medium' at the same CRF with no
+                    visible quality loss
+            crf: libx264 constant rate factor (0-51). 18-28 is the useful
+                 range; each +6 roughly halves the file size
+            png_level: PNG zlib level 0-9. DEFLATE dominates PNG encode
+                       time, and level 1 is several times faster than
+                       Pillow's default of 6 for a modestly larger file
+            ffmpeg_threads: Threads per libx264 encode. 0 uses every core,
+                            which suits one video at a time; a small cap
+                            lets several encodes share the CPU efficiently
+            stream_copy: If True, videos that are already H.264/AAC are
+                         copied into the MP4 container without re-encoding,
+                         which takes seconds instead of minutes
+            optimize_png: If True, losslessly recompress each PNG with
+                          oxipng (if installed) for the smallest files
+            image_format: 'png', or 'webp' for lossless WebP, which is
+                          typically 20-30% smaller than PNG and quicker to
+                          write than PNG at higher levels
+            tune: libx264 tune (one of X264_TUNES), or None to leave
+                  x264's defaults
+            nvenc_preset: NVENC preset p1 (fastest) to p7 (best). 'p2'
+                          encodes about a third faster than 'p4'; with
+                          CQ 25 it trades a little quality for speed
         """
         logging.info("Initializing iOS Converter")
         
+        self.preset: str = preset
+        self.crf: int = crf
+        self.tune: Optional[str] = tune
+        self.nvenc_preset: str = nvenc_preset
+        self.png_level: int = png_level
+        self.image_format: str = image_format
+        self.ffmpeg_threads: int = ffmpeg_threads
+        self.stream_copy: bool = stream_copy
+        
+        self.oxipng_path: Optional[str] = shutil.which('oxipng') if optimize_png else None
+        if optimize_png and not self.oxipng_path:
+            logging.warning("oxipng not found, PNGs will not be optimized")
+        
         self.ffmpeg_path: Optional[str] = self._find_ffmpeg()
         if self.ffmpeg_path:
             logging.info(f"FFmpeg found: {self.ffmpeg_path}")
@@ -161,18 +353,38 @@ class IOSConverter:
             logging.warning("FFmpeg not found")
         
         # Detect GPU encoder
-        self.gpu_encoder: Optional[str] = self._detect_gpu_encoder() if self.ffmpeg_path else None
+        self.gpu_encoder: Optional[str] = (
+            self._detect_gpu_encoder(self.ffmpeg_path, hw_encoder)
+            if self.ffmpeg_path and enable_gpu else None
+        )
         if self.gpu_encoder:
             logging.info(f"GPU encoder detected: {self.gpu_encoder}")
         else:
             logging.info("No GPU encoder available, will use CPU encoding")
-    
-    def _find_ffmpeg(self) -> Optional[str]:
+        
+        # Filled by _gpu_input_args, per video codec and pixel format
+        self._gpu_input_cache: dict = {}
+        
+        # Output directories convert_file has already created
+        self._made_dirs: set = set()
+        
+        # The output options are the same for every video, so they're built
+        # once here and only the input/output paths are added per file
+        self._cpu_args: Tuple[str, ...] = tuple(self._encode_args('libx264'))
+        self._gpu_args: Tuple[str, ...] = (
+            tuple(self._encode_args(self.gpu_encoder)) if self.gpu_encoder else ()
+        )
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _find_ffmpeg() -> Optional[str]:
         """
         Find the FFmpeg executable.
         
         Searches multiple locations to find FFmpeg, prioritizing bundled
-        versions for portability.
+        versions for portability. The result is cached, so later
+        converters in the same process (e.g. in check_dependencies and
+        main) don't search again.
         
         Returns:
             str: Path to FFmpeg executable if found
@@ -209,18 +421,11 @@ class IOSConverter:
             # __file__ may not exist in frozen exe
             pass
         
-        # Check if ffmpeg is in system PATH
-        try:
-            result = subprocess.run(
-                ['ffmpeg', '-version'],
-                capture_output=True,
-                text=True,
-                timeout=10  # Prevent hanging
-            )
-            if result.returncode == 0:
-                return 'ffmpeg'
-        except (FileNotFoundError, subprocess.TimeoutExpired):
-            pass
+        # Check if ffmpeg is in system PATH (a directory lookup, not a
+        # process launch like running 'ffmpeg -version')
+        system_ffmpeg = shutil.which('ffmpeg')
+        if system_ffmpeg:
+            return system_ffmpeg
         
         # Check common Windows installation paths
         common_paths = [
@@ -235,7 +440,9 @@ class IOSConverter:
         
         return None
     
-    def _detect_gpu_encoder(self) -> Optional[str]:
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _detect_gpu_encoder(ffmpeg_path: str, only: Optional[str] = None) -> Optional[str]:
         """
         Detect available GPU encoder for hardware acceleration.
         
@@ -243,12 +450,20 @@ class IOSConverter:
         1. NVIDIA NVENC (h264_nvenc)
         2. AMD AMF (h264_amf)
         3. Intel Quick Sync (h264_qsv)
+        4. Apple VideoToolbox (h264_videotoolbox)
+        
+        The test encodes take seconds, so the result is cached per FFmpeg
+        binary; check_dependencies() and main() share one detection.
+        
+        Args:
+            ffmpeg_path: FFmpeg executable to test with
+            only: If given, test just this encoder
         
         Returns:
             str: Name of available GPU encoder
             None: If no GPU encoder available (falls back to CPU)
         """
-        if not self.ffmpeg_path:
+        if not ffmpeg_path:
             return None
         
         # List of GPU encoders to test (in priority order)
@@ -256,60 +471,53 @@ class IOSConverter:
             ('h264_nvenc', 'NVIDIA NVENC'),
             ('h264_amf', 'AMD AMF'),
             ('h264_qsv', 'Intel Quick Sync'),
+            ('h264_videotoolbox', 'Apple VideoToolbox'),
         ]
+        if only:
+            encoders = [(e, name) for e, name in encoders if e == only]
         
         logging.info("Detecting GPU encoders...")
         
+        # List the compiled-in encoders once for all candidates
+        try:
+            result = subprocess.run(
+                [ffmpeg_path, '-hide_banner', '-encoders'],
+                capture_output=True,
+                text=True,
+                timeout=5
+            )
+            # Lines look like " V....D h264_nvenc   NVIDIA NVENC H.264 encoder"
+            available = {
+                parts[1] for parts in map(str.split, result.stdout.splitlines())
+                if len(parts) >= 2
+            } if result.returncode == 0 else set()
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logging.warning(f"  ✗ Could not list FFmpeg encoders: {str(e)}")
+            return None
+        
         for encoder, name in encoders:
             try:
                 logging.debug(f"Testing {name} ({encoder})...")
                 
                 # First check if encoder is listed
-                result = subprocess.run(
-                    [self.ffmpeg_path, '-hide_banner', '-encoders'],
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
-                
-                if result.returncode == 0 and encoder in result.stdout:
+                if encoder in available:
                     logging.debug(f"  {encoder} found in FFmpeg encoders list")
                     
-                    # Verify encoder actually works with real encoding parameters
-                    # Test with settings similar to actual video conversion
+                    # Verify the encoder can open a session with one small
+                    # frame; failed sessions are what listed-but-unusable
+                    # encoders run into. (Encoding options are left out:
+                    # a failed real encode still falls back to CPU.)
                     test_cmd = [
-                        self.ffmpeg_path,
+                        ffmpeg_path,
+                        '-hide_banner',
+                        '-nostdin',
                         '-f', 'lavfi',
-                        '-i', 'testsrc=duration=1:size=1280x720:rate=30',  # HD test pattern
+                        '-i', 'color=size=256x256:rate=1',
+                        '-frames:v', '1',
                         '-c:v', encoder,
-                    ]
-                    
-                    # Add encoder-specific settings
-                    if encoder == 'h264_nvenc':
-                        test_cmd.extend([
-                            '-preset', 'p4',
-                            '-tune', 'hq',
-                            '-rc', 'vbr',
-                            '-cq', '23',
-                            '-b:v', '5M'
-                        ])
-                    elif encoder == 'h264_qsv':
-                        test_cmd.extend([
-                            '-preset', 'medium',
-                            '-global_quality', '23',
-                            '-b:v', '5M'
-                        ])
-                    elif encoder == 'h264_amf':
-                        test_cmd.extend([
-                            '-quality', 'balanced',
-                            '-rc', 'vbr_latency',
-                            '-b:v', '5M'
-                        ])
-                    
-                    test_cmd.extend([
                         '-f', 'null',
                         '-'
-                    ])
+                    ]
                     
                     test_result = subprocess.run(
                         test_cmd,
@@ -351,10 +559,10 @@ class IOSConverter:
         Args:
             input_path: Path to the input HEIC/HEIF file
             output_path: Optional output path. If None, uses input path
-                        with .png extension
+                        with .png extension (.webp for image_format='webp')
         
         Returns:
-            Path: Path to the created PNG file
+            Path: Path to the created PNG (or WebP) file
         
         Raises:
             RuntimeError: If Pillow or pillow-heif is not installed
@@ -374,44 +582,198 @@ class IOSConverter:
         if not HEIF_SUPPORT:
             raise RuntimeError("pillow-heif is not installed. Run: pip install pillow-heif")
         
+        _load_pillow()
+        
         # Normalize paths
         input_path = Path(input_path)
         if output_path is None:
-            output_path = input_path.with_suffix('.png')
+            output_path = input_path.with_suffix('.' + self.image_format)
         else:
             output_path = Path(output_path)
         
         logging.info(f"Converting HEIC: {input_path} -> {output_path}")
-        print(f"Converting: {input_path.name} -> {output_path.name}")
         
         try:
-            # Open image using context manager to ensure proper cleanup
-            # This prevents memory leaks by ensuring the image is closed
-            with Image.open(input_path) as img:
-                # Check if image has transparency (alpha channel)
-                # RGBA: RGB with Alpha, LA: Grayscale with Alpha, P: Palette mode
-                has_transparency = (
-                    img.mode in ('RGBA', 'LA') or
-                    (img.mode == 'P' and 'transparency' in img.info)
-                )
+            # libheif's own RGB(A) buffer skips Pillow's decode plugin and the
+            # mode probing below; other modes take the generic Pillow path
+            if not self._save_heif_direct(input_path, output_path):
+                # Open image using context manager to ensure proper cleanup
+                # This prevents memory leaks by ensuring the image is closed
+                with Image.open(input_path) as img:
+                    # Check if image has transparency (alpha channel)
+                    # RGBA: RGB with Alpha, LA: Grayscale with Alpha, P: Palette mode
+                    has_transparency = (
+                        img.mode in ('RGBA', 'LA') or
+                        (img.mode == 'P' and 'transparency' in img.info)
+                    )
                 
-                logging.debug(f"  Image mode: {img.mode}, Size: {img.size}, Transparency: {has_transparency}")
+                    logging.debug(f"  Image mode: {img.mode}, Size: {img.size}, Transparency: {has_transparency}")
                 
-                if has_transparency:
-                    # Keep transparency for PNG output
-                    img.save(output_path, 'PNG')
-                else:
-                    # Convert to RGB (removes any alpha channel issues)
-                    # This also handles unusual color modes like CMYK
-                    img.convert('RGB').save(output_path, 'PNG')
+                    if has_transparency or img.mode in ('RGB', 'L'):
+                        # Keep transparency for PNG output; RGB and grayscale
+                        # are saved as-is, since convert('RGB') would copy the
+                        # whole decoded image (and triple grayscale's size)
+                        self._save_image(img, output_path)
+                    else:
+                        # Convert to RGB (removes any alpha channel issues)
+                        # This also handles unusual color modes like CMYK
+                        self._save_image(img.convert('RGB'), output_path)
+            
+            # Size-minimal output is a separate, opt-in pass
+            if self.oxipng_path and self.image_format == 'png':
+                self._optimize_png(output_path)
             
             logging.info(f"  ✓ Successfully converted: {output_path}")
-            print(f"✓ Completed: {output_path.name}")
             return output_path
         except Exception as e:
             logging.error(f"  ✗ Image conversion failed: {str(e)}", exc_info=True)
             raise
     
+    def _save_heif_direct(self, input_path: Path, output_path: Path) -> bool:
+        """
+        Save a HEIF in image_format straight from libheif's decoded buffer.
+        
+        pillow-heif decodes into a buffer that Image.frombuffer wraps
+        without copying, and the HEIF's own mode tells whether it has
+        alpha, so neither Image.open nor a mode conversion is needed.
+        The wrapped image has no info of its own, so the HEIF's ICC
+        profile (Display P3 on iPhones) and EXIF are passed on explicitly.
+        
+        Args:
+            input_path: Path to the input HEIC/HEIF file
+            output_path: Path for the PNG or WebP file (see _save_image)
+        
+        Returns:
+            bool: False, without writing anything, if the image isn't 8-bit
+                  RGB/RGBA/L or libheif can't read it (the caller then uses
+                  the Pillow path, which reports a proper error)
+        """
+        try:
+            heif = pillow_heif.open_heif(input_path, convert_hdr_to_8bit=True)
+            if heif.mode not in ('RGB', 'RGBA', 'L'):
+                return False
+            data = heif.data  # Decodes the primary image
+        except Exception:
+            return False
+        
+        logging.debug(f"  HEIF mode: {heif.mode}, Size: {heif.size}, Alpha: {heif.has_alpha}")
+        
+        img = Image.frombuffer(heif.mode, heif.size, data, 'raw', heif.mode, heif.stride, 1)
+        self._save_image(img, output_path, icc_profile=heif.info.get('icc_profile'),
+                         exif=self._upright_exif(heif.info.get('exif')))
+        return True
+    
+    @staticmethod
+    def _upright_exif(exif: Optional[bytes]) -> Optional["Image.Exif"]:
+        """
+        Parse HEIF EXIF and mark it as upright.
+        
+        libheif has already applied the HEIF's rotation to the pixels, so
+        an Orientation tag left as-is would make viewers rotate them again.
+        
+        Args:
+            exif: Raw EXIF from pillow-heif, or None
+        
+        Returns:
+            Image.Exif: The EXIF with Orientation 1, or None if there is none
+        """
+        if not exif:
+            return None
+        parsed = Image.Exif()
+        parsed.load(exif)
+        if 0x0112 in parsed:  # Orientation
+            parsed[0x0112] = 1
+        return parsed
+    
+    def _save_image(
+        self,
+        img: "Image.Image",
+        output_path: Path,
+        icc_profile: Optional[bytes] = None,
+        exif: Optional["Image.Exif"] = None
+    ) -> None:
+        """
+        Write a decoded image in the configured image_format.
+        
+        PNG and lossless WebP both carry an ICC profile and EXIF, so the
+        color space and photo metadata survive the conversion.
+        
+        Args:
+            img: Image to save
+            output_path: Path for the output file
+            icc_profile: ICC profile to embed; defaults to img's own
+            exif: EXIF to embed, if any
+        """
+        options = {}
+        icc_profile = icc_profile or img.info.get('icc_profile')
+        if icc_profile:
+            options['icc_profile'] = icc_profile
+        if exif:
+            options['exif'] = exif
+        
+        if self.image_format == 'webp':
+            # method 4 is libwebp's default effort; higher is much slower
+            img.save(output_path, 'WEBP', lossless=True, method=4, **options)
+        else:
+            img.save(output_path, 'PNG', compress_level=self.png_level, optimize=False,
+                     **options)
+    
+    def _optimize_png(self, png_path: Path) -> None:
+        """
+        Losslessly recompress a PNG in place with oxipng.
+        
+        A failure is logged and leaves the original PNG untouched.
+        
+        Args:
+            png_path: PNG file to optimize
+        """
+        try:
+            result = subprocess.run(
+                [self.oxipng_path, '-q', '-o', '2', '--strip', 'safe', str(png_path)],
+                capture_output=True,
+                text=True,
+                timeout=300
+            )
+            if result.returncode != 0:
+                logging.warning(f"  oxipng failed for {png_path}: {result.stderr.strip()}")
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logging.warning(f"  oxipng failed for {png_path}: {str(e)}")
+    
+    def convert_heic_batch(
+        self,
+        input_paths: List[str],
+        output_dir: str | Path
+    ) -> List[Tuple[str, bool, Optional[str]]]:
+        """
+        Convert several HEIC/HEIF images into one directory.
+        
+        The output directory is created once and pillow-heif is set up
+        once for the whole batch, rather than per file as convert_file
+        does. A failed image doesn't stop the others.
+        
+        Args:
+            input_paths: Paths to the input HEIC/HEIF files
+            output_dir: Directory for the converted images
+        
+        Returns:
+            list: (file_path, succeeded, error message or None) per input,
+                  in input order
+        """
+        output_dir = os.fspath(output_dir)
+        os.makedirs(output_dir, exist_ok=True)
+        suffix = '.' + self.image_format
+        
+        results: List[Tuple[str, bool, Optional[str]]] = []
+        for input_path in input_paths:
+            stem = os.path.splitext(os.path.basename(input_path))[0]
+            try:
+                self.convert_heic_to_png(input_path, os.path.join(output_dir, stem + suffix))
+                results.append((input_path, True, None))
+            except Exception as e:
+                logging.error(f"Conversion failed for {input_path}: {str(e)}", exc_info=True)
+                results.append((input_path, False, str(e)))
+        return results
+    
     def convert_mov_to_mp4(
         self,
         input_path: str | Path,
@@ -436,9 +798,11 @@ class IOSConverter:
             FileNotFoundError: If input file doesn't exist
         
         FFmpeg Settings:
-            - Video: H.264 (libx264), CRF 23, medium preset
-            - Audio: AAC, 128kbps
-            - Flags: faststart (enables streaming)
+            - Video: H.264 (libx264), configurable CRF (default 23) and
+              preset (default faster)
+            - Audio: AAC, 128kbps (none for videos without sound)
+            - Flags: faststart (enables streaming), use_metadata_tags
+              (keeps Apple's location and camera tags)
         
         Example:
             >>> converter = IOSConverter()
@@ -461,142 +825,98 @@ class IOSConverter:
             output_path = Path(output_path)
         
         logging.info(f"Converting video: {input_path} -> {output_path}")
-        print(f"Converting: {input_path.name} -> {output_path.name}")
+        
+        # One probe decides on stream copy, audio, rate control and GPU decoding;
+        # stream_copy=False (--force-reencode) only turns off copying the video
+        video, audio, duration, pix_fmt = self._probe_media(input_path)
+        
+        # Most iPhone videos are already H.264/AAC and only need a new container
+        copy_args = self._copy_args(video, audio) if self.stream_copy else None
+        if copy_args:
+            logging.info("  Video is MP4-compatible, copying without re-encoding")
+            cmd = self._build_cmd(input_path, output_path, [
+                '-map_metadata', '0',
+                *copy_args,
+                '-movflags', '+faststart+use_metadata_tags',
+            ])
+            try:
+                returncode, stderr = self._run_ffmpeg(cmd, timeout=3600)
+            except (OSError, subprocess.TimeoutExpired) as e:
+                returncode, stderr = -1, str(e)
+            
+            if returncode == 0:
+                logging.info(f"  ✓ Successfully converted: {output_path}")
+                return output_path
+            
+            logging.warning(f"  Stream copy failed, re-encoding:\n{stderr}")
         
         # Determine if we should use GPU acceleration
         use_gpu = self.gpu_encoder is not None
         
-        # Build FFmpeg command based on GPU availability
+        # AAC audio is copied and silent clips (e.g. screen recordings) get
+        # no audio encoder; only other or unknown audio is encoded
+        audio_mode = self._audio_mode(video, audio)
+        short = duration is not None and duration < self.SHORT_CLIP_SECONDS
+        if audio_mode == 'aac' and not short:
+            cpu_args, gpu_args = self._cpu_args, self._gpu_args
+        else:
+            cpu_args = self._encode_args('libx264', audio=audio_mode)
+            gpu_args = (self._encode_args(self.gpu_encoder, audio=audio_mode, short=short)
+                        if use_gpu else ())
+        
+        # A one-frame trial picks the GPU decoding mode, or skips the GPU,
+        # before a full encode rather than after a failed one
+        gpu_input_args = self._gpu_input_args(input_path, video, pix_fmt) if use_gpu else None
+        use_gpu = gpu_input_args is not None
+        
+        # Build FFmpeg command based on GPU availability; the CPU command
+        # doubles as the fallback if a GPU encode fails partway
+        cpu_cmd = self._build_cmd(input_path, output_path, cpu_args)
         if use_gpu:
             logging.info(f"  Using GPU acceleration: {self.gpu_encoder}")
-            
-            # GPU-accelerated encoding with encoder-specific settings
-            cmd = [
-                self.ffmpeg_path,
-                '-i', str(input_path),       # Input file
-                '-c:v', self.gpu_encoder,    # GPU video encoder
-            ]
-            
-            # Add encoder-specific parameters
-            if self.gpu_encoder == 'h264_nvenc':
-                # NVIDIA NVENC settings
-                cmd.extend([
-                    '-preset', 'p4',         # NVENC preset (p1-p7, p4 is balanced)
-                    '-tune', 'hq',           # High quality tuning
-                    '-profile:v', 'high',    # H.264 High Profile
-                    '-rc', 'vbr',            # Variable bitrate
-                    '-cq', '23',             # Constant quality (like CRF)
-                    '-b:v', '5M',            # Target bitrate
-                    '-maxrate', '8M',        # Max bitrate
-                    '-bufsize', '10M',       # Buffer size
-                ])
-            elif self.gpu_encoder == 'h264_qsv':
-                # Intel Quick Sync settings
-                cmd.extend([
-                    '-preset', 'medium',     # QSV preset (veryfast to veryslow)
-                    '-global_quality', '23', # Quality level (0-51, lower is better)
-                    '-look_ahead', '1',      # Enable lookahead for better quality
-                    '-b:v', '5M',            # Target bitrate
-                    '-maxrate', '8M',        # Max bitrate
-                    '-bufsize', '10M',       # Buffer size
-                ])
-            elif self.gpu_encoder == 'h264_amf':
-                # AMD AMF settings
-                cmd.extend([
-                    '-quality', 'balanced',  # AMF quality preset
-                    '-rc', 'vbr_latency',    # Variable bitrate
-                    '-qp_i', '23',           # I-frame quality
-                    '-qp_p', '23',           # P-frame quality
-                    '-b:v', '5M',            # Target bitrate
-                    '-maxrate', '8M',        # Max bitrate
-                    '-bufsize', '10M',       # Buffer size
-                ])
-            
-            # Common settings for all GPU encoders
-            cmd.extend([
-                '-c:a', 'aac',               # Audio codec: AAC
-                '-b:a', '128k',              # Audio bitrate: 128 kbps
-                '-movflags', '+faststart',   # Enable progressive download
-                '-y',                        # Overwrite output
-                str(output_path)
-            ])
-            print(f"  ⚡ Using GPU acceleration: {self.gpu_encoder}")
+            cmd = self._build_cmd(input_path, output_path, gpu_args, gpu_input_args)
         else:
             logging.info("  Using CPU encoding")
-            
-            # CPU encoding (fallback)
-            cmd = [
-                self.ffmpeg_path,
-                '-i', str(input_path),      # Input file
-                '-c:v', 'libx264',          # Video codec: H.264
-                '-preset', 'medium',         # Encoding speed/quality balance
-                '-crf', '23',                # Constant Rate Factor (18-28 is good)
-                '-c:a', 'aac',               # Audio codec: AAC
-                '-b:a', '128k',              # Audio bitrate: 128 kbps
-                '-movflags', '+faststart',   # Enable progressive download/streaming
-                '-y',                        # Overwrite output without asking
-                str(output_path)
-            ]
-            print(f"  💻 Using CPU encoding")
+            cmd = cpu_cmd
         
         logging.debug(f"  FFmpeg command: {' '.join(cmd)}")
         
         try:
-            # Run FFmpeg with captured output
+            # Run FFmpeg, keeping the tail of its output for error reports
             # Using timeout to prevent infinite hangs on corrupted files
-            result = subprocess.run(
+            returncode, stderr = self._run_ffmpeg(
                 cmd,
-                capture_output=True,
-                text=True,
                 timeout=3600  # 1 hour timeout for large files
             )
             
-            if result.returncode != 0:
+            if returncode != 0:
                 # FFmpeg failed
-                stderr_lines = result.stderr.strip().split('\n') if result.stderr else []
+                stderr_lines = stderr.strip().split('\n') if stderr else []
                 error_msg = stderr_lines[-1] if stderr_lines else "Unknown error"
                 
-                # Log full FFmpeg error output
-                logging.error(f"  FFmpeg failed with return code {result.returncode}")
-                logging.error(f"  Error output:\n{result.stderr}")
+                # Log FFmpeg error output
+                logging.error(f"  FFmpeg failed with return code {returncode}")
+                logging.error(f"  Error output:\n{stderr}")
                 
                 # If GPU encoding failed, automatically retry with CPU
                 if use_gpu:
+                    # The trial passed but the encode didn't, so test the
+                    # next video of this kind again instead of trusting it
+                    self._gpu_input_cache.pop((video, pix_fmt), None)
                     logging.warning(f"  GPU encoding failed: {error_msg}")
                     logging.info("  Retrying with CPU encoding...")
-                    print(f"\n⚠️  GPU encoding failed, retrying with CPU...")
-                    print(f"   GPU Error: {error_msg}")
-                    
-                    # Rebuild command for CPU fallback
-                    cmd = [
-                        self.ffmpeg_path,
-                        '-i', str(input_path),
-                        '-c:v', 'libx264',
-                        '-preset', 'medium',
-                        '-crf', '23',
-                        '-c:a', 'aac',
-                        '-b:a', '128k',
-                        '-movflags', '+faststart',
-                        '-y',
-                        str(output_path)
-                    ]
-                    print(f"  💻 Using CPU encoding")
                     
+                    cmd = cpu_cmd
                     logging.debug(f"  CPU fallback command: {' '.join(cmd)}")
                     
                     # Retry with CPU
-                    result = subprocess.run(
-                        cmd,
-                        capture_output=True,
-                        text=True,
-                        timeout=3600
-                    )
+                    returncode, stderr = self._run_ffmpeg(cmd, timeout=3600)
                     
-                    if result.returncode != 0:
-                        stderr_lines = result.stderr.strip().split('\n') if result.stderr else []
+                    if returncode != 0:
+                        stderr_lines = stderr.strip().split('\n') if stderr else []
                         error_msg = stderr_lines[-1] if stderr_lines else "Unknown error"
                         logging.error(f"  CPU encoding also failed: {error_msg}")
-                        logging.error(f"  CPU error output:\n{result.stderr}")
+                        logging.error(f"  CPU error output:\n{stderr}")
                         raise RuntimeError(f"Video conversion failed: {error_msg}")
                     else:
                         logging.info("  ✓ CPU encoding succeeded after GPU failure")
@@ -615,9 +935,412 @@ class IOSConverter:
             raise
         
         logging.info(f"  ✓ Successfully converted: {output_path}")
-        print(f"✓ Completed: {output_path.name}")
         return output_path
     
+    def _build_cmd(
+        self,
+        input_path: str | Path,
+        output_path: str | Path,
+        output_args: Sequence[str],
+        input_args: Sequence[str] = ()
+    ) -> List[str]:
+        """
+        Assemble an FFmpeg command for one input and one MP4 output.
+        
+        Args:
+            input_path: Path to the input video
+            output_path: Path for the MP4 file (overwritten if it exists)
+            output_args: Codec and container options
+            input_args: Options for the input, such as -hwaccel
+        
+        Returns:
+            list: FFmpeg command line
+        """
+        return [self.ffmpeg_path, *input_args, '-i', str(input_path),
+                *output_args, '-y', str(output_path)]
+    
+    def _gpu_input_args(
+        self,
+        input_path: str | Path,
+        video: Optional[str],
+        pix_fmt: Optional[str] = None
+    ) -> Optional[Tuple[str, ...]]:
+        """
+        Find how the GPU encoder should receive a video's frames.
+        
+        Decoding on the same GPU keeps frames in its memory, with no copies
+        to and from system RAM, but some inputs (e.g. 10-bit HDR) are
+        rejected that way, and some the encoder can't take at all. Encoding
+        the first frame tells which, in a fraction of a second, instead of
+        a full encode failing partway through. The answer depends on the
+        codec and its bit depth (8-bit SDR and 10-bit HDR HEVC differ), so
+        it's cached per video codec and pixel format.
+        
+        Args:
+            input_path: Path to the video file
+            video: Video codec from _probe_media (None if unknown)
+            pix_fmt: Pixel format from _probe_media (None if unknown)
+        
+        Returns:
+            tuple: FFmpeg input options, zero-copy GPU decoding if it works,
+                   else '-hwaccel auto'
+            None: If the GPU encoder fails on this video (encode on CPU)
+        """
+        key = (video, pix_fmt)
+        if video is not None and key in self._gpu_input_cache:
+            return self._gpu_input_cache[key]
+        
+        candidates = []
+        decoder = self.HW_DECODERS.get(self.gpu_encoder)
+        if decoder and (self.gpu_encoder != 'h264_amf' or platform.system() == 'Windows'):
+            candidates.append(('-hwaccel', decoder[0], '-hwaccel_output_format', decoder[1]))
+        candidates.append(('-hwaccel', 'auto'))
+        
+        chosen = None
+        for args in candidates:
+            cmd = [
+                self.ffmpeg_path, '-hide_banner', '-nostdin',
+                *args,
+                '-i', str(input_path),
+                '-frames:v', '1',
+                '-c:v', self.gpu_encoder,
+                '-f', 'null', '-'
+            ]
+            try:
+                if subprocess.run(cmd, capture_output=True, timeout=10).returncode == 0:
+                    chosen = args
+                    break
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+            logging.debug(f"  GPU trial failed with {' '.join(args)}")
+        
+        if chosen is None:
+            logging.warning(f"  {self.gpu_encoder} can't encode {input_path}, using CPU")
+        if video is not None:
+            self._gpu_input_cache[key] = chosen
+        return chosen
+    
+    def _probe_media(
+        self,
+        input_path: str | Path
+    ) -> Tuple[Optional[str], Optional[str], Optional[float], Optional[str]]:
+        """
+        Read the first video and audio codecs, length and pixel format of a video.
+        
+        Parses the report that 'ffmpeg -i' prints, since only FFmpeg
+        (not ffprobe) is bundled with the executable.
+        
+        Args:
+            input_path: Path to the video file
+        
+        Returns:
+            tuple: (video codec, audio codec, duration in seconds, video
+                   pixel format); None for a missing stream or value, or
+                   for all four if the file can't be read
+        """
+        try:
+            result = subprocess.run(
+                [self.ffmpeg_path, '-hide_banner', '-i', str(input_path)],
+                capture_output=True,
+                text=True,
+                errors='replace',
+                timeout=30
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None, None, None, None
+        
+        codecs = {}
+        for kind, codec in _STREAM_RE.findall(result.stderr):
+            codecs.setdefault(kind, codec)
+        
+        match = _DURATION_RE.search(result.stderr)
+        duration = (int(match[1]) * 3600 + int(match[2]) * 60 + float(match[3])
+                    if match else None)
+        pix_fmt = _PIX_FMT_RE.search(result.stderr)
+        return codecs.get('Video'), codecs.get('Audio'), duration, pix_fmt and pix_fmt[1]
+    
+    def _copy_args(self, video: Optional[str], audio: Optional[str]) -> Optional[List[str]]:
+        """
+        Build codec options that copy a video's streams into MP4.
+        
+        H.264 video is always copied. AAC audio (or no audio) is copied
+        too; any other audio, such as PCM, is encoded to AAC, which
+        costs far less than re-encoding the video.
+        
+        Args:
+            video: Video codec from _probe_media
+            audio: Audio codec from _probe_media
+        
+        Returns:
+            list: Codec options, or None if the video must be re-encoded
+        """
+        if video not in self.REMUX_VIDEO_CODECS:
+            return None
+        if audio is None or audio in self.REMUX_AUDIO_CODECS:
+            return ['-c', 'copy']
+        return ['-c:v', 'copy', '-c:a', 'aac', '-b:a', '128k']
+    
+    def _audio_mode(self, video: Optional[str], audio: Optional[str]) -> Optional[str]:
+        """
+        Choose how a re-encode handles audio, from the probed codecs.
+        
+        Re-encoding AAC would only lose quality and cost CPU time, so it
+        is copied; the MP4 can hold it whatever its bitrate.
+        
+        Args:
+            video: Video codec from _probe_media
+            audio: Audio codec from _probe_media
+        
+        Returns:
+            str: 'copy' for AAC, 'aac' to encode other or unknown audio
+            None: If the video has no audio stream
+        """
+        if audio in self.REMUX_AUDIO_CODECS:
+            return 'copy'
+        if video is not None and audio is None:
+            return None
+        return 'aac'
+    
+    def _encode_args(
+        self,
+        encoder: str,
+        threads: Optional[int] = None,
+        audio: Optional[str] = 'aac',
+        short: bool = False
+    ) -> List[str]:
+        """
+        Build the FFmpeg output options for one MP4 file.
+        
+        Args:
+            encoder: 'libx264' or one of the HW_ENCODERS values
+            threads: libx264 threads, overriding ffmpeg_threads
+            audio: 'aac' to encode audio, 'copy' to copy it, or None for
+                   a video without any (see _audio_mode)
+            short: True for a clip under SHORT_CLIP_SECONDS. NVENC and AMF
+                   then use constant QP: VBR's rate control needs a longer
+                   sample to pay off and only adds work on a few seconds
+                   of video (e.g. Live Photos)
+        
+        Returns:
+            list: Codec, quality and container options
+        """
+        args = ['-c:v', encoder]
+        
+        # Add encoder-specific parameters
+        if encoder == 'h264_nvenc':
+            # NVIDIA NVENC settings
+            args.extend([
+                '-preset', self.nvenc_preset,  # NVENC preset (p1-p7, fastest first)
+                '-tune', 'hq',           # High quality tuning
+                '-profile:v', 'high',    # H.264 High Profile
+                '-rc-lookahead', '0',    # No lookahead; it costs throughput
+                '-bf', '3',              # B-frames, free on Turing and newer
+            ])
+            if short:
+                args.extend(['-rc', 'constqp', '-qp', '23'])  # Constant QP
+            else:
+                args.extend([
+                    '-rc', 'vbr',            # Variable bitrate
+                    '-cq', '25',             # Constant quality (like CRF)
+                    '-b:v', '5M',            # Target bitrate
+                    '-maxrate', '8M',        # Max bitrate
+                    '-bufsize', '10M',       # Buffer size
+                ])
+        elif encoder == 'h264_qsv':
+            # Intel Quick Sync settings
+            args.extend([
+                '-preset', 'medium',     # QSV preset (veryfast to veryslow)
+                '-global_quality', '23', # Quality level (0-51, lower is better)
+                '-look_ahead', '1',      # Enable lookahead for better quality
+                '-b:v', '5M',            # Target bitrate
+                '-maxrate', '8M',        # Max bitrate
+                '-bufsize', '10M',       # Buffer size
+            ])
+        elif encoder == 'h264_amf':
+            # AMD AMF settings
+            args.extend([
+                '-quality', 'balanced',  # AMF quality preset
+                '-rc', 'cqp' if short else 'vbr_latency',  # Constant QP or VBR
+                '-qp_i', '23',           # I-frame quality
+                '-qp_p', '23',           # P-frame quality
+            ])
+            if not short:
+                args.extend([
+                    '-b:v', '5M',            # Target bitrate
+                    '-maxrate', '8M',        # Max bitrate
+                    '-bufsize', '10M',       # Buffer size
+                ])
+        elif encoder == 'h264_videotoolbox':
+            # Apple VideoToolbox settings (bitrate-controlled only)
+            args.extend([
+                '-profile:v', 'high',    # H.264 High Profile
+                '-b:v', '5M',            # Target bitrate
+                '-maxrate', '8M',        # Max bitrate
+                '-bufsize', '10M',       # Buffer size
+            ])
+        else:
+            # CPU encoding with libx264
+            args.extend([
+                '-preset', self.preset,      # Encoding speed/quality balance
+                '-crf', str(self.crf),       # Constant Rate Factor (18-28 is good)
+                '-threads', str(self.ffmpeg_threads if threads is None else threads),  # 0 = auto
+            ])
+            if self.tune:
+                args.extend(['-tune', self.tune])  # Content-specific tuning
+        
+        # Common settings for all encoders
+        if audio == 'aac':
+            args.extend([
+                '-c:a', 'aac',           # Audio codec: AAC
+                '-b:a', '128k',          # Audio bitrate: 128 kbps
+            ])
+        elif audio == 'copy':
+            args.extend(['-c:a', 'copy'])  # Already AAC
+        else:
+            args.append('-an')           # No audio stream to encode
+        args.extend([
+            # Progressive download/streaming, and keep Apple's mdta tags
+            # (location, camera model) that MP4 otherwise drops
+            '-movflags', '+faststart+use_metadata_tags',
+        ])
+        return args
+    
+    def convert_mov_batch(
+        self,
+        input_paths: List[str],
+        output_dir: str | Path
+    ) -> List[Tuple[str, bool, Optional[str]]]:
+        """
+        Convert several videos with a single FFmpeg process.
+        
+        FFmpeg accepts many inputs and outputs in one invocation, so the
+        process start-up and codec initialization are paid once per batch
+        instead of once per file. If the batch fails, each video is
+        retried on its own so one bad file doesn't fail the others.
+        
+        Args:
+            input_paths: Paths to the input MOV/M4V files
+            output_dir: Directory for the MP4 files
+        
+        Returns:
+            list: (file_path, succeeded, error message or None) per input,
+                  in input order
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_paths = [output_dir / (Path(p).stem + '.mp4') for p in input_paths]
+        
+        if self.ffmpeg_path and len(input_paths) > 1:
+            # The outputs encode side by side, so they split one job's threads
+            threads = max(1, (self.ffmpeg_threads or os.cpu_count() or 1) // len(input_paths))
+            
+            # Each input gets the choices convert_mov_to_mp4 would make for
+            # it: stream copy, audio handling, short-clip rate control and
+            # the GPU trial. Input options such as -hwaccel apply per -i
+            inputs: List[str] = []
+            outputs: List[str] = []
+            for i, (input_path, output_path) in enumerate(zip(input_paths, output_paths)):
+                video, audio, duration, pix_fmt = self._probe_media(input_path)
+                copy_args = self._copy_args(video, audio) if self.stream_copy else None
+                input_args: Sequence[str] = ()
+                if copy_args:
+                    output_args = [*copy_args, '-movflags', '+faststart+use_metadata_tags']
+                else:
+                    encoder = 'libx264'
+                    if self.gpu_encoder:
+                        gpu_input_args = self._gpu_input_args(input_path, video, pix_fmt)
+                        if gpu_input_args is not None:
+                            encoder, input_args = self.gpu_encoder, gpu_input_args
+                    short = duration is not None and duration < self.SHORT_CLIP_SECONDS
+                    output_args = self._encode_args(encoder, threads,
+                                                    audio=self._audio_mode(video, audio),
+                                                    short=short)
+                inputs.extend([*input_args, '-i', str(input_path)])
+                
+                # Audio is optional so silent clips still map, and each output
+                # takes the metadata of its own input, not input 0's
+                outputs.extend(['-map', f'{i}:v:0', '-map', f'{i}:a?', '-map_metadata', str(i),
+                                *output_args, '-y', str(output_path)])
+            cmd = [self.ffmpeg_path, *inputs, *outputs]
+            
+            logging.info(f"Converting {len(input_paths)} videos in one FFmpeg process")
+            logging.debug(f"  FFmpeg command: {' '.join(cmd)}")
+            try:
+                returncode, stderr = self._run_ffmpeg(cmd, timeout=3600 * len(input_paths))
+            except (OSError, subprocess.TimeoutExpired) as e:
+                returncode, stderr = -1, str(e)
+            
+            if returncode == 0:
+                for output_path in output_paths:
+                    logging.info(f"  ✓ Successfully converted: {output_path}")
+                return [(str(p), True, None) for p in input_paths]
+            
+            logging.warning(f"  Batch FFmpeg run failed, converting one by one:\n{stderr}")
+        
+        results: List[Tuple[str, bool, Optional[str]]] = []
+        for input_path, output_path in zip(input_paths, output_paths):
+            try:
+                self.convert_mov_to_mp4(input_path, output_path)
+                results.append((str(input_path), True, None))
+            except Exception as e:
+                logging.error(f"Conversion failed for {input_path}: {str(e)}", exc_info=True)
+                results.append((str(input_path), False, str(e)))
+        return results
+    
+    def _run_ffmpeg(self, cmd: List[str], timeout: float) -> Tuple[int, str]:
+        """
+        Run an FFmpeg command and return its exit code and output tail.
+        
+        stderr is streamed through a 1 MB pipe buffer by a reader thread
+        that keeps only the last 200 lines, so memory stays bounded even
+        for hour-long encodes. FFmpeg's periodic status lines are kept
+        out of that tail (only the latest is logged at the end), so an
+        error report shows FFmpeg's messages rather than progress.
+        
+        Args:
+            cmd: FFmpeg command line
+            timeout: Seconds to wait before killing FFmpeg
+        
+        Returns:
+            tuple: (return code, last lines of stderr)
+        
+        Raises:
+            subprocess.TimeoutExpired: If FFmpeg runs longer than timeout
+        """
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            bufsize=1 << 20,
+            text=True,
+            errors='replace'  # Non-UTF-8 file names must not stop the reader
+        )
+        tail: deque = deque(maxlen=200)
+        status: List[str] = []
+        
+        def read_stderr() -> None:
+            for line in process.stderr:
+                if line.startswith(('frame=', 'size=')):
+                    status[:] = [line]  # e.g. "frame= 240 fps=96 ... speed=3.2x"
+                else:
+                    tail.append(line)
+        
+        reader = threading.Thread(target=read_stderr, daemon=True)
+        reader.start()
+        
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            raise
+        finally:
+            reader.join()
+        
+        if status:
+            logging.debug(f"  {status[0].strip()}")
+        return process.returncode, ''.join(tail)
+    
     def convert_file(
         self,
         input_path: str | Path,
@@ -646,34 +1369,40 @@ class IOSConverter:
             >>> converter.convert_file('photo.heic', '/output')
             PosixPath('/output/photo.png')
         """
-        input_path = Path(input_path)
-        ext = input_path.suffix.lower()
+        # Plain string operations; this runs once per file in batches
+        input_path = os.fspath(input_path)
+        head, name = os.path.split(input_path)
+        stem, ext = os.path.splitext(name)
+        ext = ext.lower()
         
         # Setup output directory
         if output_dir:
-            output_dir = Path(output_dir)
-            output_dir.mkdir(parents=True, exist_ok=True)
+            output_dir = os.fspath(output_dir)
+            # Once per directory, not one mkdir syscall per file
+            if output_dir not in self._made_dirs:
+                os.makedirs(output_dir, exist_ok=True)
+                self._made_dirs.add(output_dir)
         else:
-            output_dir = input_path.parent
+            output_dir = head
         
         # Route to appropriate converter based on extension
-        if ext in self.SUPPORTED_IMAGE_FORMATS:
-            output_path = output_dir / (input_path.stem + '.png')
+        if ext in self.IMAGE_EXTENSIONS:
+            output_path = os.path.join(output_dir, stem + '.' + self.image_format)
             return self.convert_heic_to_png(input_path, output_path)
-        elif ext in self.SUPPORTED_VIDEO_FORMATS:
-            output_path = output_dir / (input_path.stem + '.mp4')
+        elif ext in self.VIDEO_EXTENSIONS:
+            output_path = os.path.join(output_dir, stem + '.mp4')
             return self.convert_mov_to_mp4(input_path, output_path)
         else:
-            supported = self.SUPPORTED_IMAGE_FORMATS + self.SUPPORTED_VIDEO_FORMATS
             raise ValueError(
                 f"Unsupported format: {ext}\n"
-                f"Supported formats: {', '.join(supported)}"
+                f"Supported formats: {', '.join(self.SUPPORTED_SUFFIXES)}"
             )
     
     def scan_directory(
         self,
         directory: str | Path,
-        recursive: bool = True
+        recursive: bool = True,
+        verify: bool = False
     ) -> List[str]:
         """
         Scan a directory for supported iOS media files.
@@ -681,6 +1410,9 @@ class IOSConverter:
         Args:
             directory: Path to the directory to scan
             recursive: If True, scan subdirectories recursively
+            verify: If True, also read the first bytes of each match and
+                    drop files whose contents don't fit their extension
+                    (e.g. a JPEG renamed to .heic)
         
         Returns:
             list: List of absolute paths to supported files
@@ -691,23 +1423,135 @@ class IOSConverter:
             >>> print(files)
             ['/photos/img1.heic', '/photos/sub/img2.heif']
         """
-        directory = Path(directory)
-        supported_exts = self.SUPPORTED_IMAGE_FORMATS + self.SUPPORTED_VIDEO_FORMATS
+        return list(self.scan_directory_iter(directory, recursive, verify))
+    
+    def scan_directory_iter(
+        self,
+        directory: str | Path,
+        recursive: bool = True,
+        verify: bool = False
+    ) -> Iterator[str]:
+        """
+        Yield supported iOS media files as each folder is listed.
+        
+        Lets a caller start on the first files while deeper folders are
+        still being read; scan_directory collects the same paths in the
+        same order.
+        
+        Args:
+            directory: Path to the directory to scan
+            recursive: If True, scan subdirectories recursively
+            verify: If True, check file signatures (see scan_directory)
+        
+        Yields:
+            str: Absolute path to a supported file
+        """
+        if not recursive:
+            files, _ = self._list_directory(os.fspath(directory), verify)
+            yield from files
+            return
+        
+        level = [os.fspath(directory)]
+        list_safe = functools.partial(self._list_directory_safe, verify=verify)
+        
+        # Breadth-first: list every folder of a level concurrently. scandir
+        # releases the GIL, so on network shares and cold disks the listing
+        # latencies overlap instead of adding up
+        with ThreadPoolExecutor(max_workers=self.SCAN_WORKERS) as executor:
+            while level:
+                next_level: List[str] = []
+                for found, subdirs in executor.map(list_safe, level):
+                    yield from found
+                    next_level.extend(subdirs)
+                level = next_level
+    
+    def _list_directory(
+        self,
+        directory: str,
+        verify: bool = False
+    ) -> Tuple[List[str], List[str]]:
+        """
+        List one folder with os.scandir.
+        
+        scandir reports entry types without an extra stat() per file.
+        Hidden entries (such as the "._IMG_0001.HEIC" AppleDouble files
+        macOS leaves on USB drives) and SKIP_DIRS are left out before
+        any stat() call.
+        
+        Args:
+            directory: Folder to list
+            verify: If True, keep only files passing _matches_signature
+        
+        Returns:
+            tuple: (supported files, subfolders)
+        
+        Raises:
+            OSError: If the folder can't be read
+        """
+        suffixes = self.SUPPORTED_SUFFIXES
+        skip = self.SKIP_DIRS
         files: List[str] = []
+        subdirs: List[str] = []
         
-        if recursive:
-            # Walk through all subdirectories
-            for root, _, filenames in os.walk(directory):
-                for filename in filenames:
-                    if Path(filename).suffix.lower() in supported_exts:
-                        files.append(os.path.join(root, filename))
-        else:
-            # Only scan immediate directory
-            for item in directory.iterdir():
-                if item.is_file() and item.suffix.lower() in supported_exts:
-                    files.append(str(item))
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in skip:
+                        subdirs.append(entry.path)
+                # endswith() loops over the tuple in C; no Path per entry
+                elif entry.name.lower().endswith(suffixes) and entry.is_file():
+                    if not verify or self._matches_signature(entry.path):
+                        files.append(entry.path)
+        
+        return files, subdirs
+    
+    def _list_directory_safe(
+        self,
+        directory: str,
+        verify: bool = False
+    ) -> Tuple[List[str], List[str]]:
+        """
+        List one folder, treating an unreadable folder as empty.
+        
+        Args:
+            directory: Folder to list
+            verify: If True, keep only files passing _matches_signature
+        
+        Returns:
+            tuple: (supported files, subfolders)
+        """
+        try:
+            return self._list_directory(directory, verify)
+        except OSError:
+            return [], []  # Skip it like os.walk does
+    
+    def _matches_signature(self, path: str) -> bool:
+        """
+        Check that a file's first 12 bytes fit its extension.
+        
+        Both HEIF and QuickTime files are a series of boxes: a 4-byte
+        size, then a 4-byte type. A HEIF image starts with an 'ftyp' box
+        whose brand is in HEIF_BRANDS; a video starts with one of
+        VIDEO_ATOMS.
+        
+        Args:
+            path: Path to a file with a supported extension
+        
+        Returns:
+            bool: True if the contents look like the extension says,
+                  False otherwise or if the file can't be read
+        """
+        try:
+            with open(path, 'rb') as f:
+                head = f.read(12)
+        except OSError:
+            return False
         
-        return files
+        if path.lower().endswith(self.IMAGE_SUFFIXES):
+            return head[4:8] == b'ftyp' and head[8:12] in self.HEIF_BRANDS
+        return head[4:8] in self.VIDEO_ATOMS
 
 
 # =============================================================================
@@ -768,7 +1612,12 @@ def check_dependencies() -> bool:
     
     # Check Pillow
     if PIL_AVAILABLE:
-        print("  ✓ Pillow is installed")
+        if HEIF_SUPPORT:
+            _load_pillow()  # Needed for the Pillow-SIMD/zlib-ng details
+        print("  ✓ Pillow is installed" + (" (Pillow-SIMD)" if PILLOW_SIMD else "")
+              + (" with zlib-ng" if ZLIB_NG else ""))
+        if not ZLIB_NG:
+            print("  💡 Tip: pip install -U Pillow for zlib-ng (faster PNG saving)")
     else:
         print("  ✗ Pillow is NOT installed (pip install Pillow)")
         all_ok = False
@@ -798,6 +1647,236 @@ def check_dependencies() -> bool:
     return all_ok
 
 
+# =============================================================================
+# PARALLEL BATCH CONVERSION
+# =============================================================================
+
+# Converter owned by the current worker process (set by _init_worker)
+_worker_converter: Optional[IOSConverter] = None
+
+
+def _init_worker(options: dict, log_queue=None) -> None:
+    """
+    Create the converter once per worker process.
+    
+    Args:
+        options: Keyword arguments for IOSConverter
+        log_queue: If given, log records are sent to the parent process
+                   through this queue instead of being written here
+    """
+    global _worker_converter
+    if log_queue is not None:
+        # The parent's QueueListener is the only writer to the log file
+        root = logging.getLogger()
+        root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+        root.setLevel(logging.DEBUG)
+    _worker_converter = IOSConverter(**options)
+
+
+def _convert_chunk(
+    file_paths: List[str],
+    output_dir: str | Path
+) -> List[Tuple[str, bool, Optional[str]]]:
+    """
+    Convert several images inside a worker process.
+    
+    Args:
+        file_paths: Paths to the input HEIC/HEIF files
+        output_dir: Directory for the converted files
+    
+    Returns:
+        list: (file_path, succeeded, error message or None) per file
+    """
+    return _worker_converter.convert_heic_batch(file_paths, output_dir)
+
+
+def _convert_with(
+    converter: IOSConverter,
+    file_path: str,
+    output_dir: str | Path
+) -> Tuple[str, bool, Optional[str]]:
+    """
+    Convert a single file, returning the outcome instead of raising.
+    
+    Args:
+        converter: Converter to use
+        file_path: Path to the input file
+        output_dir: Directory for the converted file
+    
+    Returns:
+        tuple: (file_path, succeeded, error message or None)
+    """
+    try:
+        converter.convert_file(file_path, output_dir)
+        return file_path, True, None
+    except Exception as e:
+        logging.error(f"Conversion failed for {file_path}: {str(e)}", exc_info=True)
+        return file_path, False, str(e)
+
+
+def convert_batch(
+    converter: IOSConverter,
+    files: List[str],
+    output_dir: str | Path,
+    max_workers: Optional[int] = None
+) -> Tuple[int, int]:
+    """
+    Convert files in parallel, images and videos at the same time.
+    
+    Images are decoded and encoded by Pillow, which holds the GIL, so
+    they go to worker processes that each build their own IOSConverter
+    with the given converter's settings. Videos are encoded by FFmpeg
+    subprocesses, so threads in this process are enough to drive them;
+    one video job runs per ffmpeg_threads cores, and each job encodes
+    a group of videos with a single FFmpeg process. With a GPU encoder,
+    jobs and groups are kept within GPU_SESSIONS encode sessions.
+    
+    Both kinds are handed out largest file first, and dealt round-robin
+    into chunks and groups, so one big video or photo doesn't leave a
+    single job running long after the others have finished.
+    
+    Args:
+        converter: Converter used for videos and copied for images
+        files: Paths of the files to convert
+        output_dir: Directory for the converted files
+        max_workers: Concurrent jobs per pool (default: CPU count for
+                     images, CPU count / ffmpeg_threads for videos)
+    
+    Converters log instead of printing, so workers never contend for
+    stdout; this function shows one progress line per finished file
+    (or drives a tqdm bar when tqdm is installed). The lines of a chunk
+    or group are printed together, since every write to a Windows
+    console is slow.
+    
+    Returns:
+        tuple: (number succeeded, number failed)
+    """
+    success = 0
+    failed = 0
+    total = len(files)
+    existing: List[str] = []
+    sizes = {}
+    
+    for file_path in files:
+        # Validate file exists; its size orders the work
+        try:
+            sizes[file_path] = os.stat(file_path).st_size
+            existing.append(file_path)
+        except OSError:
+            print(f"✗ File not found: {file_path}")
+            logging.warning(f"File not found: {file_path}")
+            failed += 1
+    
+    if not existing:
+        return success, failed
+    
+    # A str pickles smaller than a Path for every image task
+    output_dir = os.fspath(output_dir)
+    
+    # Longest job first (stable, so equal sizes keep their order)
+    existing.sort(key=sizes.__getitem__, reverse=True)
+    videos = [f for f in existing if f.lower().endswith(converter.VIDEO_SUFFIXES)]
+    images = [f for f in existing if f.lower().endswith(converter.IMAGE_SUFFIXES)]
+    others = [f for f in existing if not f.lower().endswith(converter.SUPPORTED_SUFFIXES)]
+    
+    cpu_count = os.cpu_count() or 1
+    image_workers = max_workers or cpu_count
+    video_workers = max_workers or max(1, cpu_count // (converter.ffmpeg_threads or cpu_count))
+    if converter.gpu_encoder:
+        video_workers = min(video_workers, converter.GPU_SESSIONS)
+    options = {
+        'enable_gpu': False,  # Workers only convert images
+        'preset': converter.preset,
+        'crf': converter.crf,
+        'tune': converter.tune,
+        'nvenc_preset': converter.nvenc_preset,
+        'png_level': converter.png_level,
+        'ffmpeg_threads': converter.ffmpeg_threads,
+        'optimize_png': converter.oxipng_path is not None,
+        'image_format': converter.image_format,
+    }
+    
+    # Share FFmpeg processes between videos, but keep a group per video worker
+    group_size = min(converter.VIDEO_BATCH_SIZE, -(-len(videos) // video_workers)) or 1
+    if converter.gpu_encoder:
+        # Every output in a group is a session of its own
+        group_size = max(1, min(group_size, converter.GPU_SESSIONS // video_workers))
+    n_groups = -(-len(videos) // group_size)
+    groups = [videos[i::n_groups] for i in range(n_groups)]
+    
+    bar = (tqdm(total=total, initial=failed, unit='file')
+           if TQDM_AVAILABLE and sys.stdout.isatty() else None)
+    pending: List[str] = []
+    
+    def flush() -> None:
+        """Print the progress lines collected so far in one write."""
+        if pending:
+            print('\n'.join(pending))
+            pending.clear()
+    
+    def report(file_path: str, ok: bool, error: Optional[str]) -> None:
+        """Count a finished file and queue its progress line."""
+        nonlocal success, failed
+        if ok:
+            success += 1
+            line = f"✓ {os.path.basename(file_path)}"
+        else:
+            failed += 1
+            line = f"✗ Error: {os.path.basename(file_path)} - {error}"
+        
+        if bar is None:
+            pending.append(f"[{success + failed}/{total}] {line}")
+        else:
+            bar.update(1)
+            if not ok:
+                bar.write(line)
+    
+    # Unsupported files just get convert_file's error
+    for file_path in others:
+        report(*_convert_with(converter, file_path, output_dir))
+    flush()
+    
+    # Worker log records come back through a queue and are written here
+    log_queue = multiprocessing.Queue()
+    listener = logging.handlers.QueueListener(
+        log_queue, *logging.getLogger().handlers, respect_handler_level=True)
+    listener.start()
+    
+    try:
+        with ThreadPoolExecutor(max_workers=video_workers) as video_pool:
+            # Start the videos first so they encode while the images run
+            video_futures = [video_pool.submit(converter.convert_mov_batch, group, output_dir)
+                             for group in groups]
+            
+            if images:
+                # Hand out several files per task to cut inter-process overhead
+                chunksize = max(1, len(images) // (4 * image_workers))
+                n_chunks = -(-len(images) // chunksize)
+                with ProcessPoolExecutor(max_workers=image_workers,
+                                         initializer=_init_worker,
+                                         initargs=(options, log_queue)) as executor:
+                    chunk_futures = [
+                        executor.submit(_convert_chunk, images[i::n_chunks], output_dir)
+                        for i in range(n_chunks)
+                    ]
+                    for future in as_completed(chunk_futures):
+                        for result in future.result():
+                            report(*result)
+                        flush()
+            
+            for future in video_futures:
+                for result in future.result():
+                    report(*result)
+                flush()
+    finally:
+        flush()
+        listener.stop()
+        if bar is not None:
+            bar.close()
+    
+    return success, failed
+
+
 # =============================================================================
 # INTERACTIVE MODE (for standalone exe)
 # =============================================================================
@@ -856,8 +1935,8 @@ def interactive_mode() -> None:
     print(f"\n✅ Found {len(files_to_convert)} file(s) to convert:")
     
     # Show file types breakdown
-    heic_count = sum(1 for f in files_to_convert if Path(f).suffix.lower() in ['.heic', '.heif'])
-    video_count = sum(1 for f in files_to_convert if Path(f).suffix.lower() in ['.mov', '.m4v'])
+    video_count = sum(1 for f in files_to_convert if f.lower().endswith(IOSConverter.VIDEO_SUFFIXES))
+    heic_count = len(files_to_convert) - video_count
     
     if heic_count > 0:
         print(f"   📷 {heic_count} image(s) (HEIC/HEIF → PNG)")
@@ -878,29 +1957,9 @@ def interactive_mode() -> None:
     print(f"\n🔄 Converting {len(files_to_convert)} file(s)...")
     print("=" * 60)
     
-    # Process files
-    success = 0
-    failed = 0
-    
+    # Process files in parallel
     logging.info(f"Starting batch conversion of {len(files_to_convert)} files")
-    
-    for i, file_path in enumerate(files_to_convert, 1):
-        print(f"\n[{i}/{len(files_to_convert)}] ", end="")
-        logging.info(f"Processing file {i}/{len(files_to_convert)}: {file_path}")
-        
-        if not os.path.exists(file_path):
-            print(f"✗ File not found: {Path(file_path).name}")
-            logging.warning(f"File not found: {file_path}")
-            failed += 1
-            continue
-        
-        try:
-            converter.convert_file(file_path, output_dir)
-            success += 1
-        except Exception as e:
-            print(f"✗ Error: {Path(file_path).name} - {str(e)}")
-            logging.error(f"Conversion failed for {file_path}: {str(e)}", exc_info=True)
-            failed += 1
+    success, failed = convert_batch(converter, files_to_convert, output_dir)
     
     # Print summary
     print("\n" + "=" * 60)
@@ -942,6 +2001,12 @@ Examples:
   %(prog)s -d ~/Photos                   Convert all files in directory
   %(prog)s -d ~/Photos -o ~/Converted    Convert with output directory
   %(prog)s --check                       Check dependencies
+
+Video presets (libx264, same CRF):
+  ultrafast/superfast   Fastest encode, noticeably larger files
+  veryfast/faster       ~2-3x quicker than medium, visually the same (default: faster)
+  fast/medium           Slower, slightly smaller files
+  slow..veryslow        Much slower for small further size savings
         """
     )
     
@@ -965,6 +2030,85 @@ Examples:
         default=True,
         help='Scan directories recursively (default: True)'
     )
+    parser.add_argument(
+        '--verify',
+        action='store_true',
+        help='When scanning, skip files whose contents do not match their '
+             'extension (reads 12 bytes per file)'
+    )
+    parser.add_argument(
+        '--preset',
+        choices=IOSConverter.X264_PRESETS,
+        default='faster',
+        help='x264 preset for CPU video encoding (default: faster)'
+    )
+    parser.add_argument(
+        '--tune',
+        choices=IOSConverter.X264_TUNES,
+        default=None,
+        help='x264 tune for CPU video encoding, e.g. film for camera footage '
+             '(default: none)'
+    )
+    parser.add_argument(
+        '--crf',
+        type=int,
+        choices=range(52),
+        default=23,
+        metavar='{0-51}',
+        help='x264 quality, lower is better and larger (default: 23)'
+    )
+    parser.add_argument(
+        '--hwaccel',
+        choices=['none', 'auto'] + list(IOSConverter.HW_ENCODERS),
+        default='none',
+        help='Hardware video encoder: auto-detect, a specific one, or none '
+             'for CPU only (default: none)'
+    )
+    parser.add_argument(
+        '--nvenc-preset',
+        choices=IOSConverter.NVENC_PRESETS,
+        default='p2',
+        help='NVENC preset with --hwaccel nvenc, p1 fastest to p7 best (default: p2)'
+    )
+    parser.add_argument(
+        '--force-reencode',
+        action='store_true',
+        help='Re-encode H.264/AAC videos instead of copying their streams'
+    )
+    parser.add_argument(
+        '--png-level', '--png-compress',
+        dest='png_level',
+        type=int,
+        choices=range(10),
+        default=1,
+        metavar='{0-9}',
+        help='PNG compression level, higher is smaller but slower (default: 1)'
+    )
+    parser.add_argument(
+        '--format',
+        dest='image_format',
+        choices=IOSConverter.IMAGE_OUTPUT_FORMATS,
+        default='png',
+        help='Output format for images; webp is lossless and smaller (default: png)'
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=None,
+        help='Files converted at once (default: one image per CPU core, '
+             'one video per --ffmpeg-threads cores)'
+    )
+    parser.add_argument(
+        '--ffmpeg-threads',
+        type=int,
+        default=4,
+        help='Threads per video encode, 0 for all cores (default: 4)'
+    )
+    parser.add_argument(
+        '--optimize-png',
+        action='store_true',
+        help='Shrink PNGs losslessly with oxipng after saving (slow, needs oxipng)'
+    )
     parser.add_argument(
         '--check',
         action='store_true',
@@ -994,14 +2138,28 @@ Examples:
         print("Warning: Some dependencies are missing. Conversion may fail.")
         print()
     
-    # Initialize converter (GPU disabled by default for reliability)
-    converter = IOSConverter(enable_gpu=False)
+    # Initialize converter (GPU disabled by default for reliability;
+    # falls back to CPU per file if the hardware encoder fails)
+    converter = IOSConverter(
+        enable_gpu=args.hwaccel != 'none',
+        hw_encoder=IOSConverter.HW_ENCODERS.get(args.hwaccel),
+        preset=args.preset,
+        crf=args.crf,
+        tune=args.tune,
+        nvenc_preset=args.nvenc_preset,
+        png_level=args.png_level,
+        ffmpeg_threads=args.ffmpeg_threads,
+        stream_copy=not args.force_reencode,
+        optimize_png=args.optimize_png,
+        image_format=args.image_format
+    )
     files_to_convert: List[str] = list(args.files) if args.files else []
     
     # Add files from directory scan
     if args.directory:
         if os.path.isdir(args.directory):
-            found_files = converter.scan_directory(args.directory, args.recursive)
+            found_files = converter.scan_directory(args.directory, args.recursive,
+                                                   verify=args.verify)
             files_to_convert.extend(found_files)
             print(f"Found {len(found_files)} file(s) in {args.directory}")
         else:
@@ -1019,23 +2177,9 @@ Examples:
     print(f"Converting {len(files_to_convert)} file(s)...")
     print("=" * 50)
     
-    # Process files with error tracking
-    success = 0
-    failed = 0
-    
-    for file_path in files_to_convert:
-        # Validate file exists
-        if not os.path.exists(file_path):
-            print(f"✗ File not found: {file_path}")
-            failed += 1
-            continue
-        
-        try:
-            converter.convert_file(file_path, output_dir)
-            success += 1
-        except Exception as e:
-            print(f"✗ Error: {Path(file_path).name} - {str(e)}")
-            failed += 1
+    # Process files in parallel with error tracking
+    success, failed = convert_batch(converter, files_to_convert, output_dir,
+                                    max_workers=args.jobs)
     
     # Print summary
     print("=" * 50)
@@ -1044,6 +2188,8 @@ Examples:
 
 
 if __name__ == "__main__":
+    # Worker processes of a PyInstaller exe re-run it; this hands them off
+    multiprocessing.freeze_support()
     try:
         main()
     except Exception as e:
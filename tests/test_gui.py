@@ -0,0 +1,426 @@
+"""
+Unit Tests for the iOS Format Converter GUI module
+==================================================
+
+Covers the helpers in ios_converter.py that run without a window:
+- Up-to-date output detection
+- Color profiles in converted images
+- HEIF signature checks and folder scanning
+- FFmpeg duration and progress parsing
+- Cleanup after a failed PyAV remux
+- Video grouping and worker settings for batch conversion
+
+Run tests with: python -m pytest tests/test_gui.py -v
+Or simply: python tests/test_gui.py
+"""
+
+import os
+import sys
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ios_converter_cli
+from ios_converter import (
+    IOSConverter,
+    HEIF_SUPPORT,
+    PIL_AVAILABLE,
+    _is_heic,
+    _iter_supported_files,
+    _parse_duration_us,
+)
+
+# First 12 bytes of a HEIC file: box size, 'ftyp', major brand
+HEIC_HEADER = b'\x00\x00\x00\x18ftypheic'
+
+
+def _converter(**options):
+    """Build a converter that uses libx264 and a fake FFmpeg path."""
+    with patch('ios_converter._find_ffmpeg', return_value=None):
+        converter = IOSConverter(**options)
+    converter.ffmpeg_path = 'ffmpeg'
+    return converter
+
+
+class TestUpToDate(unittest.TestCase):
+    """Test cases for skipping files whose output is current."""
+    
+    def setUp(self):
+        """Create an input file in a temporary directory."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.input_path = os.path.join(self.temp_dir, 'photo.heic')
+        self.output_path = os.path.join(self.temp_dir, 'photo.png')
+        Path(self.input_path).write_bytes(HEIC_HEADER)
+        self.converter = _converter()
+    
+    def tearDown(self):
+        """Clean up temporary directory."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _write_output(self, data=b'png', age=0):
+        """Write the output, optionally older than the input by age seconds."""
+        Path(self.output_path).write_bytes(data)
+        mtime = os.stat(self.input_path).st_mtime - age
+        os.utime(self.output_path, (mtime, mtime))
+    
+    def test_missing_output_is_not_up_to_date(self):
+        """Verify a file without output is converted."""
+        self.assertFalse(self.converter._is_up_to_date(self.input_path, self.output_path))
+    
+    def test_newer_output_is_up_to_date(self):
+        """Verify an output as new as its input is skipped."""
+        self._write_output()
+        self.assertTrue(self.converter._is_up_to_date(self.input_path, self.output_path))
+    
+    def test_older_output_is_not_up_to_date(self):
+        """Verify an output older than its input is converted again."""
+        self._write_output(age=60)
+        self.assertFalse(self.converter._is_up_to_date(self.input_path, self.output_path))
+    
+    def test_empty_output_is_not_up_to_date(self):
+        """Verify a zero-byte output from an interrupted run is replaced."""
+        self._write_output(data=b'')
+        self.assertFalse(self.converter._is_up_to_date(self.input_path, self.output_path))
+    
+    def test_force_reconverts(self):
+        """Verify force=True ignores existing outputs."""
+        self._write_output()
+        self.converter.force = True
+        self.assertFalse(self.converter._is_up_to_date(self.input_path, self.output_path))
+
+
+class TestImageConversion(unittest.TestCase):
+    """Test cases for HEIC to PNG conversion."""
+    
+    def setUp(self):
+        """Create a temporary directory."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.converter = _converter()
+    
+    def tearDown(self):
+        """Clean up temporary directory."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    @unittest.skipUnless(PIL_AVAILABLE and HEIF_SUPPORT,
+                        "Pillow and pillow-heif required")
+    def test_icc_profile_is_kept(self):
+        """Verify the PNG keeps the HEIC's color profile, with or without alpha."""
+        from PIL import Image, ImageCms
+        
+        icc = ImageCms.ImageCmsProfile(ImageCms.createProfile('sRGB')).tobytes()
+        for mode, color in (('RGB', 'blue'), ('RGBA', (0, 0, 255, 128))):
+            input_path = os.path.join(self.temp_dir, f'{mode}.heic')
+            Image.new(mode, (32, 24), color).save(input_path, format='HEIF', icc_profile=icc)
+            
+            output_path = self.converter.convert_heic_to_png(input_path)
+            
+            with Image.open(output_path) as result:
+                self.assertEqual(result.mode, mode)
+                self.assertEqual(result.info.get('icc_profile'), icc, mode)
+
+
+class TestFolderScan(unittest.TestCase):
+    """Test cases for HEIF signature checks and folder scanning."""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Create the fixture tree once; no test modifies it."""
+        cls.test_dir = tempfile.mkdtemp()
+        Path(cls.test_dir, 'photo.heic').write_bytes(HEIC_HEADER + bytes(12))
+        Path(cls.test_dir, 'renamed.HEIC').write_bytes(b'\xff\xd8\xff\xe0\x00\x10JFIF')
+        Path(cls.test_dir, 'clip.MOV').touch()
+        Path(cls.test_dir, 'notes.txt').touch()
+        Path(cls.test_dir, 'sub').mkdir()
+        Path(cls.test_dir, 'sub', 'nested.heif').write_bytes(HEIC_HEADER)
+    
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up temporary directory."""
+        shutil.rmtree(cls.test_dir, ignore_errors=True)
+    
+    def test_is_heic_checks_brand(self):
+        """Verify only files with a HEIF 'ftyp' brand count as HEIC."""
+        self.assertTrue(_is_heic(os.path.join(self.test_dir, 'photo.heic')))
+        self.assertFalse(_is_heic(os.path.join(self.test_dir, 'renamed.HEIC')))
+        self.assertFalse(_is_heic(os.path.join(self.test_dir, 'missing.heic')))
+    
+    def test_is_heic_accepts_every_cli_brand(self):
+        """Verify the GUI accepts the same brands as the CLI, 'heim' included."""
+        brand_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, brand_dir, ignore_errors=True)
+        path = os.path.join(brand_dir, 'brand.heic')
+        
+        for brand in ios_converter_cli.IOSConverter.HEIF_BRANDS:
+            Path(path).write_bytes(b'\x00\x00\x00\x18ftyp' + brand)
+            self.assertTrue(_is_heic(path), brand)
+    
+    def test_scan_is_recursive_and_checks_images(self):
+        """Verify the scan recurses and drops images that aren't HEIF."""
+        found = _iter_supported_files(self.test_dir, IOSConverter.SUPPORTED_EXTENSIONS)
+        
+        names = sorted(os.path.basename(path) for path in found)
+        self.assertEqual(names, ['clip.MOV', 'nested.heif', 'photo.heic'])
+    
+    def test_scan_of_unreadable_folder_is_empty(self):
+        """Verify a missing folder yields nothing instead of raising."""
+        missing = os.path.join(self.test_dir, 'missing')
+        self.assertEqual(list(_iter_supported_files(missing, {'.heic'})), [])
+
+
+class TestProgressParsing(unittest.TestCase):
+    """Test cases for FFmpeg duration and progress parsing."""
+    
+    def test_duration_is_read_from_banner(self):
+        """Verify the input duration is converted to microseconds."""
+        lines = ['Input #0, mov,mp4\n',
+                 '  Duration: 00:01:02.50, start: 0.000000, bitrate: 9000 kb/s\n']
+        self.assertEqual(_parse_duration_us(lines), 62_500_000)
+    
+    def test_missing_duration_is_none(self):
+        """Verify a banner without a duration gives None."""
+        self.assertIsNone(_parse_duration_us(['Input #0, mov,mp4\n']))
+    
+    def test_progress_is_reported_as_fraction(self):
+        """Verify out_time_ms lines become fractions of the duration."""
+        converter = _converter()
+        proc = MagicMock(returncode=0)
+        proc.stderr = ['  Duration: 00:00:10.00, start: 0.000000\n']
+        proc.stdout = ['frame=10\n', 'out_time_ms=2500000\n', 'out_time_ms=N/A\n',
+                       'out_time_ms=10000000\n']
+        fractions = []
+        
+        with patch('subprocess.Popen', return_value=proc) as mock_popen:
+            returncode, _ = converter._run_ffmpeg(['ffmpeg', '-i', 'in.mov', 'out.mp4'],
+                                                  fractions.append)
+        
+        self.assertEqual(returncode, 0)
+        self.assertEqual(fractions, [0.25, 1.0])
+        cmd = mock_popen.call_args[0][0]
+        self.assertEqual(cmd[1:4], ['-progress', 'pipe:1', '-nostats'])
+
+
+class TestPyAVRemux(unittest.TestCase):
+    """Test cases for the in-process PyAV remux and its fallback."""
+    
+    def setUp(self):
+        """Create an input video in a temporary directory."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.input_path = os.path.join(self.temp_dir, 'clip.mov')
+        self.output_path = os.path.join(self.temp_dir, 'clip.mp4')
+        Path(self.input_path).touch()
+    
+    def tearDown(self):
+        """Clean up temporary directory."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _failing_av(self):
+        """A stand-in for the av module whose muxer fails mid-file."""
+        source = MagicMock()
+        source.__enter__.return_value = source
+        source.streams.video = [MagicMock(index=0)]
+        source.streams.video[0].codec_context.name = 'h264'
+        source.streams.audio = []
+        source.demux.return_value = [MagicMock(dts=0, stream=source.streams.video[0])]
+        
+        target = MagicMock()
+        target.__enter__.return_value = target
+        target.mux.side_effect = RuntimeError('disk full')
+    
+        def open_(path, mode='r', options=None):
+            if mode == 'w':
+                Path(path).write_bytes(b'partial')
+                return target
+            return source
+        return MagicMock(open=MagicMock(side_effect=open_))
+    
+    def test_failed_remux_removes_output_and_logs(self):
+        """Verify a failed remux leaves no partial MP4 and says why."""
+        converter = _converter()
+        converter.ffmpeg_path = None  # Stop at the FFmpeg fallback
+        messages = []
+        
+        with patch('ios_converter.AV_AVAILABLE', True), \
+             patch('ios_converter.av', self._failing_av(), create=True):
+            with self.assertRaises(RuntimeError):
+                converter.convert_mov_to_mp4(self.input_path, self.output_path,
+                                             messages.append)
+        
+        self.assertFalse(os.path.exists(self.output_path))
+        self.assertEqual(messages, ['  PyAV remux failed (disk full), using FFmpeg'])
+
+
+class TestBatchVideos(unittest.TestCase):
+    """Test cases for video grouping and worker settings."""
+    
+    def setUp(self):
+        """Create a temporary directory."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.converter = _converter()
+    
+    def tearDown(self):
+        """Clean up temporary directory."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _videos(self, count):
+        """Create count empty MOV files and return their paths."""
+        paths = []
+        for i in range(count):
+            path = os.path.join(self.temp_dir, f'clip{i}.mov')
+            Path(path).touch()
+            paths.append(path)
+        return paths
+    
+    def test_videos_are_grouped_by_batch_size(self):
+        """Verify each FFmpeg process gets at most VIDEO_BATCH_SIZE videos."""
+        videos = self._videos(IOSConverter.VIDEO_BATCH_SIZE + 2)
+        
+        with patch.object(self.converter, '_convert_video_group',
+                          side_effect=lambda paths, *args: [('success', p, p) for p in paths]
+                          ) as mock_group:
+            results = self.converter.batch_convert_videos(videos, self.temp_dir)
+        
+        sizes = [len(call.args[0]) for call in mock_group.call_args_list]
+        self.assertEqual(sizes, [IOSConverter.VIDEO_BATCH_SIZE, 2])
+        self.assertEqual([r[1] for r in results], videos)
+    
+    def test_up_to_date_videos_are_left_out_of_groups(self):
+        """Verify videos with a current MP4 skip FFmpeg entirely."""
+        videos = self._videos(2)
+        Path(self.temp_dir, 'clip0.mp4').write_bytes(b'mp4')
+        
+        with patch.object(self.converter, '_convert_video_group',
+                          return_value=[('success', videos[1], None)]) as mock_group:
+            results = self.converter.batch_convert_videos(videos, self.temp_dir)
+        
+        mock_group.assert_called_once()
+        self.assertEqual(mock_group.call_args.args[0], [videos[1]])
+        self.assertEqual(results[0][0], 'success')
+    
+    def test_group_maps_one_output_per_input(self):
+        """Verify a group command has an input and a mapped output per video."""
+        videos = self._videos(2)
+        
+        with patch('subprocess.run', return_value=MagicMock(returncode=0)) as mock_run, \
+             patch.object(self.converter, '_can_stream_copy', side_effect=[True, False]):
+            self.converter._convert_video_group(videos, self.temp_dir, None, None)
+        
+        cmd = mock_run.call_args[0][0]
+        self.assertEqual(cmd.count('-i'), 2)
+        self.assertEqual(cmd[cmd.index('-map') + 1], '0:v:0')
+        self.assertEqual(cmd[cmd.index('-c') + 1], 'copy')
+        self.assertEqual(cmd[cmd.index('-c:v') + 1], 'libx264')
+    
+    def test_failed_group_leaves_no_partial_outputs(self):
+        """Verify a failed group and failed retries are errors with no MP4s left."""
+        videos = self._videos(2)
+        
+        def write_partial(cmd, *args, **kwargs):
+            # A crashed FFmpeg leaves its outputs half written
+            for arg in cmd:
+                if str(arg).endswith('.mp4'):
+                    Path(arg).write_bytes(b'partial')
+            return MagicMock(returncode=1)
+        
+        with patch('subprocess.run', side_effect=write_partial), \
+             patch('ios_converter.AV_AVAILABLE', False), \
+             patch.object(self.converter, '_can_stream_copy', return_value=False), \
+             patch.object(self.converter, '_run_ffmpeg',
+                          side_effect=lambda cmd, *args: (write_partial(cmd).returncode,
+                                                          'error')):
+            results = self.converter._convert_video_group(videos, self.temp_dir, None, None)
+        
+        self.assertEqual([r[0] for r in results], ['error', 'error'])
+        self.assertEqual(list(Path(self.temp_dir).glob('*.mp4')), [])
+    
+    def test_group_decodes_every_input_on_hardware(self):
+        """Verify -hwaccel is given before each -i, not just the first."""
+        videos = self._videos(3)
+        self.converter.h264_encoder = 'h264_nvenc'
+        
+        with patch('subprocess.run', return_value=MagicMock(returncode=0)) as mock_run, \
+             patch.object(self.converter, '_can_stream_copy', return_value=False):
+            self.converter._convert_video_group(videos, self.temp_dir, None, None)
+        
+        cmd = mock_run.call_args[0][0]
+        for i, arg in enumerate(cmd):
+            if arg == '-i':
+                self.assertEqual(cmd[i - 2:i], ['-hwaccel', 'auto'])
+        self.assertEqual(cmd.count('-hwaccel'), 3)
+    
+    def test_single_video_keeps_configured_threads(self):
+        """Verify a lone video runs in one worker with all its threads."""
+        converter = _converter(threads=0)
+        
+        with patch('os.cpu_count', return_value=8):
+            images, videos, image_workers, video_workers = \
+                converter._plan_pools(['clip.mov'])
+            options = converter._worker_options(parallel_videos=video_workers)
+        
+        self.assertEqual((images, videos), ([], ['clip.mov']))
+        self.assertEqual((image_workers, video_workers), (0, 1))
+        self.assertEqual(options['threads'], 0)  # 0 lets x264 use every core
+    
+    def test_threads_split_between_parallel_videos(self):
+        """Verify cores are shared by the videos that encode at once."""
+        files = ['a.heic', 'b.mov', 'c.MOV', 'd.heic', 'e.heic']
+        
+        with patch('os.cpu_count', return_value=8):
+            images, videos, image_workers, video_workers = \
+                self.converter._plan_pools(files)
+            options = self.converter._worker_options(parallel_videos=video_workers)
+        
+        self.assertEqual(images, ['a.heic', 'd.heic', 'e.heic'])
+        self.assertEqual(videos, ['b.mov', 'c.MOV'])
+        self.assertEqual((image_workers, video_workers), (3, 2))
+        self.assertEqual(options['threads'], 4)
+    
+    def test_hardware_videos_are_capped_at_gpu_sessions(self):
+        """Verify no more than GPU_SESSIONS videos encode on the GPU at once."""
+        self.converter.h264_encoder = 'h264_nvenc'
+        videos = self._videos(IOSConverter.GPU_SESSIONS + 3)
+    
+        with patch('os.cpu_count', return_value=16):
+            _, _, _, video_workers = self.converter._plan_pools(videos)
+        with patch.object(self.converter, '_convert_video_group',
+                          side_effect=lambda paths, *args: [('success', p, p) for p in paths]
+                          ) as mock_group:
+            self.converter.batch_convert_videos(videos, self.temp_dir)
+    
+        self.assertEqual(video_workers, IOSConverter.GPU_SESSIONS)
+        sizes = [len(call.args[0]) for call in mock_group.call_args_list]
+        self.assertTrue(all(size <= IOSConverter.GPU_SESSIONS for size in sizes))
+        self.assertEqual(sum(sizes), len(videos))
+    
+    def test_workers_reuse_parent_encoder(self):
+        """Verify worker converters take the parent's encoder without probing."""
+        self.converter.h264_encoder = 'h264_qsv'
+        options = self.converter._worker_options()
+    
+        with patch('ios_converter._find_ffmpeg', return_value='ffmpeg'), \
+             patch('ios_converter._detect_h264_encoder') as mock_detect:
+            worker = IOSConverter(**options)
+    
+        mock_detect.assert_not_called()
+        self.assertEqual(worker.h264_encoder, 'h264_qsv')
+
+
+def run_tests():
+    """Run all tests with verbose output."""
+    # Every TestCase class in this module, in the order defined
+    suite = unittest.defaultTestLoader.loadTestsFromModule(sys.modules[__name__])
+    
+    # Run tests with verbosity
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+    
+    # Return exit code
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests())